@@ -1,64 +1,800 @@
 import os
+import importlib
+import subprocess
+import sys
+import contextlib
+import argparse
+import json
+import time
+import random
+import tempfile
+import shutil
+import threading
+import queue
+import zlib
+import hashlib
+import weakref
+import warnings
+import tracemalloc
+from collections import OrderedDict
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed, wait, FIRST_COMPLETED
 import pandas as pd
 import numpy as np
-from sklearn.model_selection import train_test_split
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.linear_model import LinearRegression
-from sklearn.metrics import mean_squared_error
-import matplotlib.pyplot as plt
+from numpy.lib.stride_tricks import sliding_window_view
 import tkinter as tk
 from tkinter import messagebox, ttk, filedialog, simpledialog
 import pickle
-import yfinance as yf
-import tensorflow as tf
-from tensorflow.keras.models import Sequential
-from tensorflow.keras.layers import Dense, LSTM, Dropout
-from sklearn.preprocessing import MinMaxScaler
+
+# Heavy backends are imported on first use, so opening the window (or running
+# a Linear Regression) does not pay for TensorFlow initialization.
+# sklearn and matplotlib are imported inside the functions that need them.
+class _LazyModule:
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+tf = _LazyModule("tensorflow")
+yf = _LazyModule("yfinance")
+
+# Pipeline instrumentation
+# Wrapping a block in stage(name) records its wall time, process CPU time, rows
+# processed and peak Python-heap growth (tracemalloc, which numpy and pandas
+# report to; TensorFlow's own allocator is not seen) into the Trace being
+# recorded on this thread. Stages nest, and outside recording() they cost a
+# thread-local lookup. A trace exports as plain JSON or as Chrome trace events
+# (open in chrome://tracing or Perfetto). Memory tracing roughly doubles the
+# cost of allocation-heavy stages and slows first-use imports far more, so it
+# is off unless TRACE_MEMORY (or --trace-memory) turns it on.
+TRACE_MEMORY = False
+
+class Trace:
+    def __init__(self, name, trace_memory=False):
+        self.name = name
+        self.trace_memory = trace_memory
+        self.spans = []
+        self.open_spans = []
+        self.origin = time.perf_counter()
+
+    def summary(self, top=None):
+        # Stages by total wall time; nested stages are included in their parents' totals
+        if not self.spans:
+            return pd.DataFrame(columns=["stage", "calls", "wall_seconds", "cpu_seconds", "rows", "peak_mb"])
+        spans = pd.DataFrame(self.spans)
+        spans["rows"] = pd.to_numeric(spans["rows"]).astype("Int64")
+        spans["peak_bytes"] = pd.to_numeric(spans["peak_bytes"])
+        table = spans.groupby("name").agg(calls=("name", "size"), wall_seconds=("wall", "sum"), cpu_seconds=("cpu", "sum"),
+                                          rows=("rows", lambda rows: rows.sum(min_count=1)), peak_mb=("peak_bytes", "max"))
+        table["peak_mb"] /= 1e6
+        table = table.sort_values("wall_seconds", ascending=False).rename_axis("stage").reset_index()
+        return table if top is None else table.head(top)
+
+    def to_dict(self):
+        return {"name": self.name, "spans": self.spans}
+
+    def chrome_events(self):
+        events = []
+        for span in self.spans:
+            events.append({"name": span["name"], "ph": "X", "ts": span["start"] * 1e6, "dur": span["wall"] * 1e6,
+                           "pid": os.getpid(), "tid": span["thread"],
+                           "args": {"cpu_seconds": span["cpu"], "rows": span["rows"], "peak_bytes": span["peak_bytes"]}})
+        return {"traceEvents": events, "displayTimeUnit": "ms", "otherData": {"run": self.name}}
+
+    def export(self, path, trace_format="json"):
+        with open(path, 'w') as f:
+            json.dump(self.chrome_events() if trace_format == "chrome" else self.to_dict(), f, indent=1)
+
+_trace_context = threading.local()
+
+def current_trace():
+    return getattr(_trace_context, "trace", None)
+
+@contextlib.contextmanager
+def recording(name=None, trace=None, trace_memory=None):
+    # Record stages run on this thread into a new trace, or keep adding to an existing one
+    trace = trace or Trace(name, TRACE_MEMORY if trace_memory is None else trace_memory)
+    previous = current_trace()
+    started_tracemalloc = trace.trace_memory and not tracemalloc.is_tracing()
+    if started_tracemalloc:
+        tracemalloc.start()
+    _trace_context.trace = trace
+    try:
+        yield trace
+    finally:
+        _trace_context.trace = previous
+        if started_tracemalloc:
+            tracemalloc.stop()
+
+@contextlib.contextmanager
+def stage(name, rows=None):
+    # Yields the span so callers can fill in "rows" once they know it
+    trace = current_trace()
+    span = {"name": name, "rows": rows}
+    if trace is None:
+        yield span
+        return
+    memory = trace.trace_memory and tracemalloc.is_tracing()
+    if memory:
+        current, peak = tracemalloc.get_traced_memory()
+        if trace.open_spans:
+            trace.open_spans[-1]["peak_bytes"] = max(trace.open_spans[-1]["peak_bytes"], peak)
+        tracemalloc.reset_peak()
+    span.update(start=time.perf_counter() - trace.origin, thread=threading.get_ident(),
+                depth=len(trace.open_spans), base_bytes=current if memory else 0, peak_bytes=current if memory else 0)
+    trace.open_spans.append(span)
+    wall, cpu = time.perf_counter(), time.process_time()
+    try:
+        yield span
+    finally:
+        span["wall"] = time.perf_counter() - wall
+        span["cpu"] = time.process_time() - cpu
+        trace.open_spans.pop()
+        if memory:
+            peak = max(span["peak_bytes"], tracemalloc.get_traced_memory()[1])
+            if trace.open_spans:
+                trace.open_spans[-1]["peak_bytes"] = max(trace.open_spans[-1]["peak_bytes"], peak)
+            span["peak_bytes"] = peak - span.pop("base_bytes")
+        else:
+            span["peak_bytes"] = None
+            span.pop("base_bytes")
+        span["rows"] = None if span["rows"] is None else int(span["rows"])
+        trace.spans.append(span)
+
+def format_timings(trace, top=5):
+    lines = [f"{row.stage}: {row.wall_seconds:.2f}s wall, {row.cpu_seconds:.2f}s CPU"
+             + (f", {row.peak_mb:.1f} MB peak" if pd.notna(row.peak_mb) else "")
+             for row in trace.summary(top).itertuples()]
+    return "\n".join(lines) if lines else "No stages recorded"
+
+def _linear_regression(**params):
+    from sklearn.linear_model import LinearRegression
+    return LinearRegression(**params)
+
+def _random_forest(**params):
+    from sklearn.ensemble import RandomForestRegressor
+    return RandomForestRegressor(**params)
+
+def _incremental_forest(n_estimators=100, **update_params):
+    # trees_per_update, max_trees and update_window only apply to later updates (see update_model)
+    return _random_forest(n_estimators=n_estimators)
+
+def _online_sgd(**params):
+    return OnlineSGDRegressor(**params)
+
+class OnlineSGDRegressor:
+    # Linear model trained by SGD on standardized features and target. The
+    # scalers are fixed by the first fit; partial_fit then takes one pass over
+    # just the rows it is given, so a daily update costs a handful of rows.
+    def __init__(self, epochs=5, alpha=1e-4):
+        self.epochs = epochs
+        self.alpha = alpha
+
+    def fit(self, X, y):
+        from sklearn.linear_model import SGDRegressor
+        from sklearn.preprocessing import StandardScaler
+        self.x_scaler = StandardScaler().fit(X)
+        self.y_scaler = StandardScaler().fit(y.reshape(-1, 1))
+        self.model = SGDRegressor(alpha=self.alpha, random_state=42)
+        for _ in range(self.epochs):
+            self.partial_fit(X, y)
+        return self
+
+    def partial_fit(self, X, y):
+        self.model.partial_fit(self.x_scaler.transform(X), self.y_scaler.transform(y.reshape(-1, 1)).ravel())
+        return self
+
+    def predict(self, X):
+        return self.y_scaler.inverse_transform(self.model.predict(self.x_scaler.transform(X)).reshape(-1, 1)).ravel()
+
+class CompactForest:
+    # A fitted random forest flattened into five node arrays shared by all
+    # trees: split feature and child indices as int32, thresholds and leaf
+    # values as float32. Leaves point to themselves, so every tree is walked
+    # for max_depth steps at once with no per-tree Python loop. The registry
+    # saves it with joblib and loads it with mmap_mode='r', so the arrays stay
+    # in the page cache and are shared by every model served from the process.
+    def __init__(self, feature, threshold, children, value, roots, max_depth, n_features):
+        self.feature = feature
+        self.threshold = threshold
+        self.children = children
+        self.value = value
+        self.roots = roots
+        self.max_depth = max_depth
+        self.n_features = n_features
+
+    @classmethod
+    def from_forest(cls, forest):
+        features, thresholds, children, values, roots = [], [], [], [], []
+        offset = 0
+        for estimator in forest.estimators_:
+            tree = estimator.tree_
+            nodes = np.arange(tree.node_count)
+            leaf = tree.children_left < 0
+            # Trees compare float32 features with float64 thresholds; rounding
+            # down to the nearest float32 keeps every sample on the same side
+            threshold = tree.threshold.astype(np.float32)
+            threshold = np.where(threshold > tree.threshold, np.nextafter(threshold, np.float32(-np.inf)), threshold)
+            features.append(np.where(leaf, 0, tree.feature))
+            thresholds.append(threshold)
+            children.append(np.stack([np.where(leaf, nodes, tree.children_left), np.where(leaf, nodes, tree.children_right)]) + offset)
+            values.append(tree.value[:, :, 0] if forest.n_outputs_ > 1 else tree.value[:, 0, 0])
+            roots.append(offset)
+            offset += tree.node_count
+        return cls(np.concatenate(features).astype(np.int32), np.concatenate(thresholds).astype(np.float32),
+                   np.concatenate(children, axis=1).astype(np.int32), np.concatenate(values).astype(np.float32),
+                   np.asarray(roots, dtype=np.int32), max(estimator.tree_.max_depth for estimator in forest.estimators_),
+                   forest.n_features_in_)
+
+    @property
+    def nbytes(self):
+        return sum(array.nbytes for array in (self.feature, self.threshold, self.children, self.value, self.roots))
+
+    def predict(self, X, block_size=4096):
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(f"Expected {self.n_features} features, got array of shape {X.shape}.")
+        # Multi-output forests keep one leaf value per output and predict (rows x outputs)
+        predictions = np.empty((len(X),) + self.value.shape[1:])
+        for start in range(0, len(X), block_size):
+            block = X[start:start + block_size]
+            rows = np.arange(len(block))[:, None]
+            node = np.broadcast_to(self.roots, (len(block), len(self.roots)))
+            for _ in range(self.max_depth):
+                go_right = block[rows, self.feature[node]] > self.threshold[node]
+                node = self.children[go_right.astype(np.intp), node]
+            predictions[start:start + len(block)] = self.value[node].mean(axis=1, dtype=np.float64)
+        return predictions
 
 # Directories for caching data and saving models
 CACHE_DIR = "cache"
 MODEL_DIR = "models"
 AVAILABLE_MODELS = {
-    "Linear Regression": LinearRegression,
-    "Random Forest": RandomForestRegressor,
-    "LSTM": lambda input_shape: create_lstm_model(input_shape)
+    "Linear Regression": _linear_regression,
+    "Random Forest": _random_forest,
+    "LSTM": lambda input_shape: create_lstm_model(input_shape),
+    "Online SGD": _online_sgd,
+    "Incremental Forest": _incremental_forest,
+    "Incremental LSTM": lambda input_shape: create_lstm_model(input_shape),
 }
 
+# Models that absorb new bars without refitting from scratch (see update_model)
+INCREMENTAL_MODELS = {"Online SGD", "Incremental Forest", "Incremental LSTM"}
+
+# Models converted to a CompactForest after fitting. Incremental Forest stays a
+# full RandomForestRegressor because its updates grow trees with warm_start.
+COMPACT_MODELS = {"Random Forest"}
+
+def _is_lstm(model_name):
+    return model_name in ("LSTM", "Incremental LSTM")
+
 # Ensure cache and model directories exist
 for directory in [CACHE_DIR, MODEL_DIR]:
     if not os.path.exists(directory):
         os.makedirs(directory)
 
 # LSTM Model Creation
-def create_lstm_model(input_shape):
+def create_lstm_model(input_shape, units=(100, 100, 50), dropout=0.2, learning_rate=0.001):
+    from tensorflow.keras.models import Sequential
+    from tensorflow.keras.layers import Dense, LSTM, Dropout
     model = Sequential()
-    model.add(LSTM(units=100, return_sequences=True, input_shape=input_shape))
-    model.add(Dropout(0.2))
-    model.add(LSTM(units=100, return_sequences=True))
-    model.add(Dropout(0.2))
-    model.add(LSTM(units=50, return_sequences=False))
-    model.add(Dropout(0.2))
+    for i, layer_units in enumerate(units):
+        if i == 0:
+            model.add(LSTM(units=layer_units, return_sequences=len(units) > 1, input_shape=input_shape))
+        else:
+            model.add(LSTM(units=layer_units, return_sequences=i < len(units) - 1))
+        model.add(Dropout(dropout))
     model.add(Dense(units=25))
     model.add(Dense(units=1))
 
-    model.compile(optimizer=tf.keras.optimizers.Adam(learning_rate=0.001), loss='mean_squared_error')
+    model.compile(optimizer=tf.keras.optimizers.Adam(learning_rate=learning_rate), loss='mean_squared_error')
     return model
 
-# Step 1: Fetch Financial Data using yfinance
-def scrape_data(stock_symbol):
-    cache_file = os.path.join(CACHE_DIR, f"{stock_symbol}.csv")
-    if os.path.exists(cache_file):
-        df = pd.read_csv(cache_file, index_col='Date', parse_dates=True)
-    else:
-        df = yf.download(stock_symbol, period="5y")
+def _lstm_architecture(params):
+    # Architecture keys are optional in the LSTM params; absent ones keep the defaults above
+    return {key: params[key] for key in ("units", "dropout", "learning_rate") if key in params}
+
+# Step 1: Fetch Financial Data using yfinance (or any DataSource below)
+# Bars are cached per symbol in a columnar, memory-mapped layout:
+#   cache/{symbol}.bars  - float64 rows of OHLCV, appended in date order
+#   cache/{symbol}.dates - int64 nanosecond timestamps, one per row
+#   cache/{symbol}.json  - row count and high-water mark (last cached bar)
+# The row count in the metadata file is only bumped after the arrays are
+# written, so a half-finished append is never visible to readers.
+BAR_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+CACHE_REFRESH_SECONDS = 6 * 60 * 60
+# During market hours Yahoo also returns the unfinished session as a daily
+# bar. Bars are only committed once their session is over (with a margin for
+# the final print), so an intraday snapshot never becomes the high-water mark.
+EXCHANGE_TIMEZONE = "America/New_York"
+SESSION_FINAL = pd.Timedelta(hours=16, minutes=30)
+
+def _exchange_now():
+    # Bars are stored with naive exchange-local timestamps, so compare against the same clock
+    return pd.Timestamp.now(tz=EXCHANGE_TIMEZONE).tz_localize(None)
+
+def _last_complete_session():
+    now = _exchange_now()
+    today = now.normalize()
+    return pd.offsets.BDay().rollback(today if now - today >= SESSION_FINAL else today - pd.Timedelta(days=1))
+
+def _cache_paths(stock_symbol):
+    base = os.path.join(CACHE_DIR, stock_symbol)
+    return base + ".bars", base + ".dates", base + ".json"
+
+def _normalize_bars(df):
+    # yfinance may return (Price, Ticker) MultiIndex columns and a tz-aware index
+    if isinstance(df.columns, pd.MultiIndex):
+        df.columns = df.columns.get_level_values(0)
+    if "Date" in df.columns:
+        df = df.set_index("Date")
+    df.index = pd.DatetimeIndex(df.index)
+    if df.index.tz is not None:
+        df.index = df.index.tz_localize(None)
+    df.index.name = "Date"
+    df = df[~df.index.duplicated(keep='last')].sort_index()
+    return df[BAR_COLUMNS].astype(np.float64)
+
+def _read_meta_file(meta_file):
+    if not os.path.exists(meta_file):
+        return None
+    with open(meta_file) as f:
+        return json.load(f)
+
+def _write_meta_file(meta_file, meta):
+    tmp_file = meta_file + ".tmp"
+    with open(tmp_file, 'w') as f:
+        json.dump(meta, f)
+    os.replace(tmp_file, meta_file)
+
+def _read_cache_meta(stock_symbol):
+    return _read_meta_file(_cache_paths(stock_symbol)[2])
+
+def _write_cache_meta(stock_symbol, meta):
+    _write_meta_file(_cache_paths(stock_symbol)[2], meta)
+
+def append_bars(stock_symbol, new_bars):
+    meta = _read_cache_meta(stock_symbol) or {"rows": 0, "columns": BAR_COLUMNS, "last_date": None}
+    if meta["last_date"] is not None and not new_bars.empty:
+        new_bars = new_bars[new_bars.index > pd.Timestamp(meta["last_date"])]
+    new_bars = new_bars[new_bars.index <= _last_complete_session()]
+    meta["checked"] = time.time()
+    if not new_bars.empty:
+        bars_file, dates_file, _ = _cache_paths(stock_symbol)
+        # Truncate to the committed row count so a previously interrupted append is overwritten
+        row_bytes = len(BAR_COLUMNS) * 8
+        for path, size in [(bars_file, meta["rows"] * row_bytes), (dates_file, meta["rows"] * 8)]:
+            with open(path, 'ab') as f:
+                f.truncate(size)
+        with open(bars_file, 'ab') as f:
+            f.write(np.ascontiguousarray(new_bars[BAR_COLUMNS].values, dtype=np.float64).tobytes())
+        with open(dates_file, 'ab') as f:
+            f.write(new_bars.index.values.astype('datetime64[ns]').astype(np.int64).tobytes())
+        if meta["rows"] == 0:
+            meta["covered_from"] = new_bars.index[0].isoformat()
+        meta["rows"] += len(new_bars)
+        meta["last_date"] = new_bars.index[-1].isoformat()
+    _write_cache_meta(stock_symbol, meta)
+    return meta
+
+def prepend_bars(stock_symbol, older_bars, covered_from):
+    # The layout is append-only, so older history means rewriting both arrays
+    # once; readers holding the old memory maps keep the replaced files alive
+    meta = _read_cache_meta(stock_symbol)
+    existing = load_cached_bars(stock_symbol)
+    older_bars = older_bars[older_bars.index < existing.index[0]] if not older_bars.empty else older_bars
+    if not older_bars.empty:
+        bars_file, dates_file, _ = _cache_paths(stock_symbol)
+        bars = np.concatenate([older_bars[BAR_COLUMNS].values.astype(np.float64), existing.values])
+        dates = np.concatenate([older_bars.index.values.astype('datetime64[ns]'), existing.index.values]).astype(np.int64)
+        for path, array in [(bars_file, bars), (dates_file, dates)]:
+            array.tofile(path + ".tmp")
+            os.replace(path + ".tmp", path)
+        meta["rows"] += len(older_bars)
+    meta["covered_from"] = min(pd.Timestamp(covered_from), pd.Timestamp(meta.get("covered_from", covered_from))).isoformat()
+    _write_cache_meta(stock_symbol, meta)
+    return meta
+
+def load_cached_bars(stock_symbol):
+    meta = _read_cache_meta(stock_symbol)
+    if meta is None or meta["rows"] == 0:
+        return None
+    bars_file, dates_file, _ = _cache_paths(stock_symbol)
+    rows = meta["rows"]
+    # Read-only memory maps: the DataFrame wraps the mapped pages without parsing or copying
+    values = np.memmap(bars_file, dtype=np.float64, mode='r', shape=(rows, len(BAR_COLUMNS)))
+    dates = np.memmap(dates_file, dtype=np.int64, mode='r', shape=(rows,))
+    index = pd.DatetimeIndex(dates.view('datetime64[ns]'), name="Date")
+    return pd.DataFrame(values, index=index, columns=BAR_COLUMNS, copy=False)
+
+# Data sources: anything with fetch(symbol, start=None, period=None) returning
+# normalized OHLCV bars can stand in for yfinance (e.g. the offline fixture source).
+class DataSource:
+    def fetch(self, stock_symbol, start=None, period=None, end=None):
+        raise NotImplementedError
+
+    def fetch_intraday(self, stock_symbol, interval="1m", start=None):
+        raise NotImplementedError
+
+class TransientFetchError(Exception):
+    # The provider failed to answer (network error, rate limit); retrying may help
+    pass
+
+class YFinanceSource(DataSource):
+    # Uses Ticker.history, which keeps its state on the Ticker object.
+    # yf.download resets module-level result dicts on every call, so it is not
+    # safe from the fetch_universe worker threads. With raise_errors=True a
+    # failure is raised instead of being swallowed into an empty frame.
+    PERMANENT_ERRORS = ("YFPricesMissingError", "YFTzMissingError", "YFInvalidPeriodError")
+    PERMANENT_MESSAGES = ("delisted", "not found", "no data", "no price data", "no timezone")
+
+    def _history(self, stock_symbol, **kwargs):
+        try:
+            df = yf.Ticker(stock_symbol).history(raise_errors=True, **kwargs)
+        except Exception as e:
+            if type(e).__name__ in self.PERMANENT_ERRORS or any(marker in str(e).lower() for marker in self.PERMANENT_MESSAGES):
+                return pd.DataFrame(columns=BAR_COLUMNS)
+            raise TransientFetchError(f"Download failed for {stock_symbol.upper()}: {e}") from e
         if df.empty:
-            raise ValueError("No data found for this stock symbol.")
-        df.reset_index(inplace=True)
-        df.set_index("Date", inplace=True)
-        df.to_csv(cache_file)
-    
+            return pd.DataFrame(columns=BAR_COLUMNS)
+        return _normalize_bars(df)
+
+    def fetch(self, stock_symbol, start=None, period=None, end=None):
+        if start is not None:
+            return self._history(stock_symbol, start=start, end=end)
+        return self._history(stock_symbol, period=period or "5y")
+
+    def fetch_intraday(self, stock_symbol, interval="1m", start=None):
+        # Yahoo only serves 1-minute bars for the last week
+        earliest = pd.Timestamp.today().normalize() - pd.Timedelta(days=6)
+        start = earliest if start is None else max(pd.Timestamp(start), earliest)
+        return self._history(stock_symbol, start=start.strftime("%Y-%m-%d"), interval=interval)
+
+class FixtureSource(DataSource):
+    # Serves {symbol}.csv files from fixture_dir, or a deterministic random walk
+    # seeded by the symbol name, with optional simulated network latency.
+    def __init__(self, fixture_dir=None, latency=0.0, end=None):
+        self.fixture_dir = fixture_dir
+        self.latency = latency
+        # Built once: generating a business-day calendar is far slower than the bars themselves
+        self.calendar = pd.bdate_range(end=pd.Timestamp(end or pd.Timestamp.today().normalize()), periods=5 * 252, name="Date")
+
+    def _synthetic_bars(self, stock_symbol):
+        periods = len(self.calendar)
+        rng = np.random.default_rng(zlib.crc32(stock_symbol.encode()))
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.015, periods)))
+        spread = np.abs(rng.normal(0, 0.01, periods))
+        index = self.calendar
+        return pd.DataFrame({
+            'Open': close * (1 + rng.normal(0, 0.005, periods)),
+            'High': close * (1 + spread),
+            'Low': close * (1 - spread),
+            'Close': close,
+            'Volume': rng.integers(100_000, 10_000_000, periods).astype(np.float64),
+        }, index=index)
+
+    def fetch(self, stock_symbol, start=None, period=None, end=None):
+        if self.latency:
+            time.sleep(self.latency)
+        fixture_file = os.path.join(self.fixture_dir, f"{stock_symbol}.csv") if self.fixture_dir else None
+        if fixture_file and os.path.exists(fixture_file):
+            df = _normalize_bars(pd.read_csv(fixture_file, index_col='Date', parse_dates=True))
+        elif self.fixture_dir:
+            return pd.DataFrame(columns=BAR_COLUMNS)
+        else:
+            df = self._synthetic_bars(stock_symbol)
+        if end is not None:
+            df = df[df.index < pd.Timestamp(end)]
+        if start is not None:
+            return df[df.index >= pd.Timestamp(start)]
+        years = int(period[:-1]) if period and period.endswith("y") else 5
+        return df[df.index > df.index[-1] - pd.DateOffset(years=years)]
+
+    def fetch_intraday(self, stock_symbol, interval="1m", start=None, days=30):
+        # 390 one-minute bars (09:30-16:00) for each of the last `days` sessions
+        if self.latency:
+            time.sleep(self.latency)
+        sessions = self.calendar[-days:].values.astype('datetime64[ns]').astype(np.int64)
+        dates = (sessions[:, np.newaxis] + (9 * 60 + 30 + np.arange(390)) * 60 * 10**9).ravel()
+        rng = np.random.default_rng(zlib.crc32(f"{stock_symbol}@{interval}".encode()))
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.0008, len(dates))))
+        open_ = np.concatenate([close[:1], close[:-1]])
+        spread = np.abs(rng.normal(0, 0.0004, len(dates)))
+        df = pd.DataFrame({
+            'Open': open_,
+            'High': np.maximum(open_, close) * (1 + spread),
+            'Low': np.minimum(open_, close) * (1 - spread),
+            'Close': close,
+            'Volume': rng.integers(100, 20_000, len(dates)).astype(np.float64),
+        }, index=pd.DatetimeIndex(dates.view('datetime64[ns]'), name="Date"))
+        return df if start is None else df[df.index >= pd.Timestamp(start)]
+
+DEFAULT_SOURCE = YFinanceSource()
+
+def _cache_is_stale(meta):
+    if time.time() - meta.get("checked", 0) < CACHE_REFRESH_SECONDS:
+        return False
+    return pd.Timestamp(meta["last_date"]) < _last_complete_session()
+
+def _import_legacy_csv(stock_symbol):
+    csv_file = os.path.join(CACHE_DIR, f"{stock_symbol}.csv")
+    if os.path.exists(csv_file):
+        append_bars(stock_symbol, _normalize_bars(pd.read_csv(csv_file, index_col='Date', parse_dates=True)))
+
+def scrape_data(stock_symbol, refresh=True, source=None):
+    source = source or DEFAULT_SOURCE
+    with stage("scrape_data") as span:
+        meta = _read_cache_meta(stock_symbol)
+        if meta is None:
+            _import_legacy_csv(stock_symbol)
+            meta = _read_cache_meta(stock_symbol)
+
+        if meta is None or meta["rows"] == 0:
+            with stage("download") as download:
+                df = source.fetch(stock_symbol, period="5y")
+                download["rows"] = len(df)
+            if df.empty:
+                raise ValueError("No data found for this stock symbol.")
+            append_bars(stock_symbol, df)
+        elif refresh and _cache_is_stale(meta):
+            # Only fetch the bars after the high-water mark and append them
+            start = (pd.Timestamp(meta["last_date"]) + pd.Timedelta(days=1)).strftime("%Y-%m-%d")
+            with stage("download") as download:
+                new_bars = source.fetch(stock_symbol, start=start)
+                download["rows"] = len(new_bars)
+            append_bars(stock_symbol, new_bars)
+
+        df = load_cached_bars(stock_symbol)
+        span["rows"] = len(df)
     return df
 
+# Date-range queries are answered from the local store. Coverage is tracked
+# as [covered_from, last check]; only the parts of a request outside it are
+# fetched and merged, so repeated lookups make no network calls. The result
+# is an iloc slice (a view) located by binary search on the sorted dates.
+def load_range(stock_symbol, start=None, end=None, source=None):
+    source = source or DEFAULT_SOURCE
+    df = scrape_data(stock_symbol, source=source)
+    meta = _read_cache_meta(stock_symbol)
+    covered_from = pd.Timestamp(meta.get("covered_from", df.index[0]))
+    if start is not None and pd.Timestamp(start) < covered_from:
+        older = source.fetch(stock_symbol, start=pd.Timestamp(start).strftime("%Y-%m-%d"), end=covered_from.strftime("%Y-%m-%d"))
+        prepend_bars(stock_symbol, older, start)
+        df = load_cached_bars(stock_symbol)
+    lo = 0 if start is None else df.index.searchsorted(pd.Timestamp(start), side='left')
+    # Like yfinance, the end date is exclusive
+    hi = len(df) if end is None else df.index.searchsorted(pd.Timestamp(end), side='left')
+    return df.iloc[lo:hi]
+
+# Step 1g: Intraday bars
+# Minute bars are stored per symbol in monthly chunks under cache/intraday/:
+#   {symbol}/{YYYY-MM}.bars  - float64 OHLCV rows, appended in time order
+#   {symbol}/{YYYY-MM}.dates - int64 nanosecond timestamps
+#   {symbol}/index.json      - committed row count per chunk, last bar, last check
+# A range query only maps the chunks it overlaps. Coarser bars (5m, 1h, 1d)
+# are aggregated chunk by chunk with reduceat over bucket boundaries, so the
+# full minute history is never in memory at once. Bar sizes must divide a day,
+# which keeps every bucket inside one chunk. As with daily bars, the minute
+# that is still trading is never committed; it is fetched again once closed.
+INTRADAY_INTERVAL = "1m"
+INTRADAY_REFRESH_SECONDS = 60
+_BAR_UNITS = {"m": 60, "h": 60 * 60, "d": 24 * 60 * 60}
+
+def _intraday_paths(stock_symbol, chunk=None):
+    base = os.path.join(CACHE_DIR, "intraday", stock_symbol)
+    if chunk is None:
+        return os.path.join(base, "index.json")
+    return os.path.join(base, chunk + ".bars"), os.path.join(base, chunk + ".dates")
+
+def bar_nanoseconds(interval):
+    count, unit = interval[:-1], interval[-1:]
+    if unit not in _BAR_UNITS or not count.isdigit() or int(count) == 0:
+        raise ValueError(f"Unsupported bar size: {interval}")
+    step = int(count) * _BAR_UNITS[unit] * 10**9
+    if (_BAR_UNITS["d"] * 10**9) % step:
+        raise ValueError(f"Bar size {interval} must divide one day.")
+    return step
+
+def resample_arrays(dates, values, step):
+    # dates: sorted int64 ns; values: (n, 5) OHLCV. Buckets start at multiples of step.
+    if len(dates) == 0:
+        return np.asarray(dates[:0]), np.asarray(values[:0])
+    buckets = dates - dates % step
+    starts = np.flatnonzero(np.concatenate([[True], buckets[1:] != buckets[:-1]]))
+    ends = np.append(starts[1:], len(dates)) - 1
+    out = np.empty((len(starts), len(BAR_COLUMNS)))
+    out[:, 0] = values[starts, 0]
+    out[:, 1] = np.maximum.reduceat(values[:, 1], starts)
+    out[:, 2] = np.minimum.reduceat(values[:, 2], starts)
+    out[:, 3] = values[ends, 3]
+    out[:, 4] = np.add.reduceat(values[:, 4], starts)
+    return buckets[starts], out
+
+def resample_bars(df, interval):
+    dates, values = resample_arrays(df.index.values.astype('datetime64[ns]').astype(np.int64), df[BAR_COLUMNS].values,
+                                    bar_nanoseconds(interval))
+    return pd.DataFrame(values, index=pd.DatetimeIndex(dates.view('datetime64[ns]'), name="Date"), columns=BAR_COLUMNS)
+
+def append_intraday(stock_symbol, new_bars):
+    meta_file = _intraday_paths(stock_symbol)
+    meta = _read_meta_file(meta_file) or {"interval": INTRADAY_INTERVAL, "chunks": {}, "last_date": None}
+    new_bars = new_bars.dropna()
+    if meta["last_date"] is not None and not new_bars.empty:
+        new_bars = new_bars[new_bars.index > pd.Timestamp(meta["last_date"])]
+    new_bars = new_bars[new_bars.index + pd.Timedelta(bar_nanoseconds(meta["interval"]), "ns") <= _exchange_now()]
+    meta["checked"] = time.time()
+    os.makedirs(os.path.dirname(meta_file), exist_ok=True)
+    if not new_bars.empty:
+        dates = new_bars.index.values.astype('datetime64[ns]')
+        values = np.ascontiguousarray(new_bars[BAR_COLUMNS].values, dtype=np.float64)
+        months = dates.astype('datetime64[M]')
+        bounds = np.append(np.flatnonzero(np.concatenate([[True], months[1:] != months[:-1]])), len(dates))
+        for lo, hi in zip(bounds[:-1], bounds[1:]):
+            chunk = str(months[lo])
+            rows = meta["chunks"].get(chunk, 0)
+            bars_file, dates_file = _intraday_paths(stock_symbol, chunk)
+            # Same commit protocol as the daily store: drop uncommitted rows, append, then bump the count
+            for path, size in [(bars_file, rows * len(BAR_COLUMNS) * 8), (dates_file, rows * 8)]:
+                with open(path, 'ab') as f:
+                    f.truncate(size)
+            with open(bars_file, 'ab') as f:
+                f.write(values[lo:hi].tobytes())
+            with open(dates_file, 'ab') as f:
+                f.write(dates[lo:hi].astype(np.int64).tobytes())
+            meta["chunks"][chunk] = rows + int(hi - lo)
+        meta["last_date"] = new_bars.index[-1].isoformat()
+    _write_meta_file(meta_file, meta)
+    return meta
+
+def load_intraday(stock_symbol, start=None, end=None, interval=None):
+    meta = _read_meta_file(_intraday_paths(stock_symbol))
+    if meta is None or not meta["chunks"]:
+        return None
+    step = None if interval in (None, meta["interval"]) else bar_nanoseconds(interval)
+    start = None if start is None else np.datetime64(pd.Timestamp(start), 'ns')
+    end = None if end is None else np.datetime64(pd.Timestamp(end), 'ns')
+    date_parts, value_parts = [], []
+    for chunk in sorted(meta["chunks"]):
+        # Chunks outside the requested months are never opened
+        month = np.datetime64(chunk, 'M')
+        if (start is not None and month < start.astype('datetime64[M]')) or (end is not None and month > end.astype('datetime64[M]')):
+            continue
+        rows = meta["chunks"][chunk]
+        bars_file, dates_file = _intraday_paths(stock_symbol, chunk)
+        values = np.memmap(bars_file, dtype=np.float64, mode='r', shape=(rows, len(BAR_COLUMNS)))
+        dates = np.memmap(dates_file, dtype=np.int64, mode='r', shape=(rows,))
+        lo = 0 if start is None else dates.searchsorted(start.astype(np.int64), side='left')
+        hi = rows if end is None else dates.searchsorted(end.astype(np.int64), side='left')
+        dates, values = dates[lo:hi], values[lo:hi]
+        if step is not None:
+            dates, values = resample_arrays(dates, values, step)
+        date_parts.append(dates)
+        value_parts.append(values)
+    if len(value_parts) == 1:
+        dates, values = date_parts[0], value_parts[0]
+    else:
+        dates, values = np.concatenate(date_parts), np.concatenate(value_parts)
+    index = pd.DatetimeIndex(np.asarray(dates).view('datetime64[ns]'), name="Date")
+    return pd.DataFrame(values, index=index, columns=BAR_COLUMNS, copy=False)
+
+def refresh_intraday(stock_symbol, source=None):
+    source = source or DEFAULT_SOURCE
+    meta = _read_meta_file(_intraday_paths(stock_symbol))
+    if meta is not None and time.time() - meta.get("checked", 0) < INTRADAY_REFRESH_SECONDS:
+        return meta
+    with stage("download") as span:
+        new_bars = source.fetch_intraday(stock_symbol, INTRADAY_INTERVAL, start=None if meta is None else meta["last_date"])
+        span["rows"] = len(new_bars)
+    if meta is None and new_bars.empty:
+        raise ValueError("No intraday data found for this stock symbol.")
+    return append_intraday(stock_symbol, new_bars)
+
+def bar_key(stock_symbol, interval="1d"):
+    # Features, models and predictions for intraday bars are stored under "symbol@interval"
+    return stock_symbol if interval == "1d" else f"{stock_symbol}@{interval}"
+
+def load_bars(stock_symbol, interval="1d", refresh=True, source=None):
+    # Daily bars come from the daily store; any other size from the minute store
+    if interval == "1d":
+        return scrape_data(stock_symbol, refresh=refresh, source=source)
+    with stage("load_intraday") as span:
+        if refresh:
+            refresh_intraday(stock_symbol, source)
+        df = load_intraday(stock_symbol, interval=interval)
+        if df is None:
+            raise ValueError("No intraday data found for this stock symbol.")
+        span["rows"] = len(df)
+    return df
+
+# Step 1b: Batch download for a universe of symbols
+# Every request goes through one shared token bucket so the whole pool stays
+# under the provider's rate limit regardless of how many workers are running.
+class RateLimiter:
+    def __init__(self, rate_per_second, burst=1):
+        self.rate = float(rate_per_second)
+        self.capacity = float(max(burst, 1))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+class RateLimitedSource(DataSource):
+    # Takes a token only for real requests; symbols served from a fresh cache cost nothing
+    def __init__(self, source, limiter):
+        self.source = source
+        self.limiter = limiter
+
+    def fetch(self, stock_symbol, start=None, period=None, end=None):
+        self.limiter.acquire()
+        return self.source.fetch(stock_symbol, start=start, period=period, end=end)
+
+    def fetch_intraday(self, stock_symbol, interval="1m", start=None):
+        self.limiter.acquire()
+        return self.source.fetch_intraday(stock_symbol, interval=interval, start=start)
+
+def _fetch_with_retry(stock_symbol, source, retries, backoff, refresh):
+    for attempt in range(retries + 1):
+        try:
+            df = scrape_data(stock_symbol, refresh=refresh, source=source)
+            return {"symbol": stock_symbol, "rows": len(df), "attempts": attempt + 1, "error": None}
+        except ValueError as e:
+            # Unknown symbol / empty response: retrying will not help
+            return {"symbol": stock_symbol, "rows": 0, "attempts": attempt + 1, "error": str(e)}
+        except Exception as e:
+            # TransientFetchError, network and rate-limit errors
+            if attempt == retries:
+                return {"symbol": stock_symbol, "rows": 0, "attempts": attempt + 1, "error": str(e)}
+            # Exponential backoff with jitter so failed workers do not retry in lockstep
+            time.sleep(backoff * (2 ** attempt) * (0.5 + random.random()))
+
+def fetch_universe(symbols, source=None, max_workers=8, rate_per_second=5.0, burst=5, retries=3, backoff=1.0, refresh=True, progress=None):
+    symbols = list(dict.fromkeys(s.strip().lower() for s in symbols if s.strip()))
+    source = source or DEFAULT_SOURCE
+    if rate_per_second:
+        source = RateLimitedSource(source, RateLimiter(rate_per_second, burst))
+    results = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = [pool.submit(_fetch_with_retry, symbol, source, retries, backoff, refresh) for symbol in symbols]
+        for future in as_completed(futures):
+            result = future.result()
+            results[result["symbol"]] = result
+            if progress is not None:
+                progress(len(results), len(symbols), result)
+    return results
+
+def benchmark_universe_download(n_symbols=500, max_workers=16, rate_per_second=200.0, latency=0.02):
+    global CACHE_DIR
+    symbols = [f"sym{i:04d}" for i in range(n_symbols)]
+    source = FixtureSource(latency=latency)
+    original_cache_dir = CACHE_DIR
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        CACHE_DIR = tmp_dir
+        try:
+            start = time.perf_counter()
+            results = fetch_universe(symbols, source=source, max_workers=max_workers, rate_per_second=rate_per_second, burst=max_workers)
+            elapsed = time.perf_counter() - start
+        finally:
+            CACHE_DIR = original_cache_dir
+    failed = sum(1 for r in results.values() if r["error"])
+    print(f"Downloaded {n_symbols - failed}/{n_symbols} symbols in {elapsed:.2f}s "
+          f"({n_symbols / elapsed:.1f} symbols/s, {max_workers} workers, {rate_per_second:g} req/s limit, {latency * 1000:.0f} ms simulated latency)")
+    return elapsed
+
 # Step 1a: Feature Engineering
 def add_technical_indicators(df):
     # Calculate moving averages
@@ -77,10 +813,6 @@ def add_technical_indicators(df):
     # Drop any rows with NaN values (e.g., those caused by rolling calculations)
     df.dropna(inplace=True)
 
-    # Debugging: Print the first few rows to check if features are added correctly
-    print("Technical indicators and lag features added:")
-    print(df.head())
-
     return df
 
 def compute_RSI(df, window=14):
@@ -98,60 +830,1899 @@ def compute_MACD(df):
     Signal = MACD.ewm(span=9, adjust=False).mean()
     return MACD, Signal
 
+# Step 1c: Panel indicator engine
+# Computes the same indicators as add_technical_indicators for a whole
+# (symbols x days) block of closes at once. Rolling means come from cumulative
+# sums, the EMAs step through days with one vector op across all symbols, and
+# every result is written straight into a preallocated float32 output.
+MA_WINDOWS = (5, 10, 20)
+RSI_WINDOW = 14
+CLOSE_LAGS = tuple(range(1, 6))
+INDICATOR_COLUMNS = [f'MA{w}' for w in MA_WINDOWS] + ['RSI', 'MACD', 'Signal'] + [f'Close_lag_{lag}' for lag in CLOSE_LAGS]
+FEATURE_COLUMNS = ['Open', 'High', 'Low', 'Volume'] + INDICATOR_COLUMNS
+
+def _panel_rolling_mean(values, window, out):
+    # Window sums via cumsum; windows touching a NaN stay NaN, like pandas rolling()
+    missing = np.isnan(values)
+    csum = np.zeros((values.shape[0], values.shape[1] + 1))
+    np.cumsum(np.where(missing, 0.0, values), axis=1, out=csum[:, 1:])
+    cmiss = np.zeros(csum.shape, dtype=np.int64)
+    np.cumsum(missing, axis=1, out=cmiss[:, 1:])
+    out[:, :window - 1] = np.nan
+    sums = csum[:, window:] - csum[:, :-window]
+    gaps = cmiss[:, window:] - cmiss[:, :-window]
+    out[:, window - 1:] = np.where(gaps == 0, sums / window, np.nan)
+    return out
+
+def _panel_ewm(values, span, out):
+    # ewm(span, adjust=False): each symbol's EMA starts at its first valid value
+    # and carries forward unchanged across missing bars
+    alpha = 2.0 / (span + 1.0)
+    state = np.full(values.shape[0], np.nan)
+    for t in range(values.shape[1]):
+        x = values[:, t]
+        state = np.where(np.isnan(state), x, np.where(np.isnan(x), state, alpha * x + (1 - alpha) * state))
+        out[:, t] = state
+    return out
+
+def compute_indicator_panel(close, out=None):
+    close = np.asarray(close, dtype=np.float64)
+    n_symbols, n_days = close.shape
+    if out is None:
+        out = np.empty((len(INDICATOR_COLUMNS), n_symbols, n_days), dtype=np.float32)
+    elif out.shape != (len(INDICATOR_COLUMNS), n_symbols, n_days):
+        raise ValueError(f"Output block must have shape {(len(INDICATOR_COLUMNS), n_symbols, n_days)}, got {out.shape}.")
+    column = {name: i for i, name in enumerate(INDICATOR_COLUMNS)}
+    scratch = np.empty((n_symbols, n_days))
+
+    for window in MA_WINDOWS:
+        out[column[f'MA{window}']] = _panel_rolling_mean(close, window, scratch)
+
+    # compute_RSI treats the first (NaN) difference as no change
+    delta = np.zeros_like(close)
+    delta[:, 1:] = np.nan_to_num(close[:, 1:] - close[:, :-1])
+    gain = _panel_rolling_mean(np.maximum(delta, 0.0), RSI_WINDOW, np.empty_like(close))
+    loss = _panel_rolling_mean(np.maximum(-delta, 0.0), RSI_WINDOW, np.empty_like(close))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rsi = 100 - (100 / (1 + gain / loss))
+    # Symbols with a shorter history only get an RSI once they have a full window of their own bars
+    rsi[np.cumsum(~np.isnan(close), axis=1) < RSI_WINDOW] = np.nan
+    out[column['RSI']] = rsi
+
+    fast = _panel_ewm(close, 12, np.empty_like(close))
+    slow = _panel_ewm(close, 26, np.empty_like(close))
+    np.subtract(fast, slow, out=fast)
+    out[column['MACD']] = fast
+    out[column['Signal']] = _panel_ewm(fast, 9, slow)
+
+    for lag in CLOSE_LAGS:
+        lagged = out[column[f'Close_lag_{lag}']]
+        lagged[:, :lag] = np.nan
+        lagged[:, lag:] = close[:, :-lag]
+    return out
+
+# Step 1d: Streaming indicator state
+# Carries everything needed to extend the indicators by one bar: a ring
+# buffer of recent closes (moving averages and lags), rolling gain/loss sums
+# (RSI) and the three EMA values (MACD/Signal). Each update is O(1) and the
+# results match the batch functions above.
+class IndicatorState:
+    RING_SIZE = max(max(MA_WINDOWS), max(CLOSE_LAGS) + 1)
+
+    def __init__(self):
+        self.count = 0
+        self.last_date = None
+        self.closes = [0.0] * self.RING_SIZE
+        self.gains = [0.0] * RSI_WINDOW
+        self.losses = [0.0] * RSI_WINDOW
+        self.ma_sums = {window: 0.0 for window in MA_WINDOWS}
+        self.gain_sum = 0.0
+        self.loss_sum = 0.0
+        self.ema_fast = None
+        self.ema_slow = None
+        self.signal = None
+
+    def _close_back(self, steps):
+        # Close from `steps` bars ago (0 = latest)
+        return self.closes[(self.count - 1 - steps) % self.RING_SIZE]
+
+    def update(self, close, date=None):
+        close = float(close)
+        prev_close = self._close_back(0) if self.count else close
+        for window in MA_WINDOWS:
+            self.ma_sums[window] += close
+            if self.count >= window:
+                self.ma_sums[window] -= self._close_back(window - 1)
+        self.closes[self.count % self.RING_SIZE] = close
+
+        delta = close - prev_close
+        slot = self.count % RSI_WINDOW
+        self.gain_sum += max(delta, 0.0) - self.gains[slot]
+        self.loss_sum += max(-delta, 0.0) - self.losses[slot]
+        self.gains[slot] = max(delta, 0.0)
+        self.losses[slot] = max(-delta, 0.0)
+
+        if self.ema_fast is None:
+            self.ema_fast = self.ema_slow = close
+        else:
+            self.ema_fast += (2.0 / 13.0) * (close - self.ema_fast)
+            self.ema_slow += (2.0 / 27.0) * (close - self.ema_slow)
+        macd = self.ema_fast - self.ema_slow
+        self.signal = macd if self.signal is None else self.signal + (2.0 / 10.0) * (macd - self.signal)
+
+        self.count += 1
+        self.last_date = None if date is None else pd.Timestamp(date).isoformat()
+        if self.count % self.RING_SIZE == 0:
+            self._resync()
+        return self.features()
+
+    def _resync(self):
+        # Running sums slowly pick up rounding error; rebuild them from the
+        # ring buffers once per wrap (amortized constant time)
+        for window in MA_WINDOWS:
+            self.ma_sums[window] = sum(self._close_back(i) for i in range(min(window, self.count)))
+        self.gain_sum = sum(self.gains)
+        self.loss_sum = sum(self.losses)
+
+    def features(self):
+        row = {}
+        for window in MA_WINDOWS:
+            row[f'MA{window}'] = self.ma_sums[window] / window if self.count >= window else np.nan
+        if self.count >= RSI_WINDOW:
+            gain, loss = self.gain_sum / RSI_WINDOW, self.loss_sum / RSI_WINDOW
+            row['RSI'] = np.nan if gain == loss == 0 else 100.0 if loss == 0 else 100 - (100 / (1 + gain / loss))
+        else:
+            row['RSI'] = np.nan
+        row['MACD'] = self.ema_fast - self.ema_slow if self.count else np.nan
+        row['Signal'] = self.signal if self.count else np.nan
+        for lag in CLOSE_LAGS:
+            row[f'Close_lag_{lag}'] = self._close_back(lag) if self.count > lag else np.nan
+        return row
+
+    @classmethod
+    def from_history(cls, df):
+        state = cls()
+        for date, close in zip(df.index, df['Close'].values):
+            state.update(close, date)
+        return state
+
+    def to_dict(self):
+        return {key: value for key, value in self.__dict__.items()}
+
+    @classmethod
+    def from_dict(cls, data):
+        state = cls()
+        state.__dict__.update(data)
+        state.ma_sums = {int(window): value for window, value in data['ma_sums'].items()}
+        return state
+
+    def save(self, path):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.to_dict(), f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+def update_indicator_state(stock_symbol):
+    # Apply only the cached bars newer than the saved state; the first call replays the history once
+    state_file = os.path.join(CACHE_DIR, f"{stock_symbol}.indicators.json")
+    df = scrape_data(stock_symbol, refresh=False)
+    state = IndicatorState.load(state_file) if os.path.exists(state_file) else IndicatorState()
+    if state.last_date is not None:
+        df = df[df.index > pd.Timestamp(state.last_date)]
+    for date, close in zip(df.index, df['Close'].values):
+        state.update(close, date)
+    state.save(state_file)
+    return state
+
+# Step 1e: Feature store
+# Memoizes add_technical_indicators per (symbol, data fingerprint, indicator
+# config). Recent frames stay in an in-process LRU bounded by bytes; every
+# frame is also spilled to disk so a restart or eviction does not rebuild it.
+FEATURE_CONFIG = {"ma_windows": MA_WINDOWS, "rsi_window": RSI_WINDOW, "macd_spans": (12, 26, 9), "lags": CLOSE_LAGS}
+
+def data_fingerprint(df):
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(np.ascontiguousarray(df.index.values.astype('datetime64[ns]')).tobytes())
+    digest.update(np.ascontiguousarray(df[BAR_COLUMNS].values, dtype=np.float64).tobytes())
+    return digest.hexdigest()
+
+def _config_fingerprint(config):
+    return hashlib.blake2b(json.dumps(config, sort_keys=True).encode(), digest_size=8).hexdigest()
+
+def model_fingerprint(df):
+    # Registry key for models trained on df: its bars, plus the cross-asset universe when enabled
+    fingerprint = data_fingerprint(df)
+    cross = cross_asset_config()
+    if cross is None:
+        return fingerprint
+    return hashlib.blake2b((fingerprint + _config_fingerprint(cross)).encode(), digest_size=16).hexdigest()
+
+class FeatureStore:
+    def __init__(self, max_bytes=256 * 1024 * 1024, spill_dir=None, config=None):
+        self.max_bytes = max_bytes
+        self.spill_dir = spill_dir
+        self.config = config or FEATURE_CONFIG
+        self.frames = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def _spill_dir(self):
+        return self.spill_dir or os.path.join(CACHE_DIR, "features")
+
+    def _spill_file(self, key):
+        return os.path.join(self._spill_dir(), "_".join(key) + ".pkl")
+
+    def key(self, stock_symbol, df, cross=None):
+        config = dict(self.config, compact=True) if COMPACT_FEATURES else self.config
+        if cross is not None:
+            config = dict(config, cross_asset=cross)
+        return (stock_symbol, data_fingerprint(df), _config_fingerprint(config))
+
+    def _remember(self, key, features):
+        with self.lock:
+            if key in self.frames:
+                self.frames.move_to_end(key)
+                return
+            self.frames[key] = features
+            self.nbytes += features.memory_usage(deep=False).sum()
+            while self.nbytes > self.max_bytes and len(self.frames) > 1:
+                _, evicted = self.frames.popitem(last=False)
+                self.nbytes -= evicted.memory_usage(deep=False).sum()
+
+    def _spill(self, key, features):
+        os.makedirs(self._spill_dir(), exist_ok=True)
+        # One spilled frame per symbol: older fingerprints are superseded by fresher data
+        prefix = key[0] + "_"
+        for name in os.listdir(self._spill_dir()):
+            if name.startswith(prefix) and name.count("_") == key[0].count("_") + 2:
+                os.remove(os.path.join(self._spill_dir(), name))
+        tmp_file = self._spill_file(key) + ".tmp"
+        features.to_pickle(tmp_file)
+        os.replace(tmp_file, self._spill_file(key))
+
+    def get(self, stock_symbol, df):
+        cross = cross_asset_config()
+        key = self.key(stock_symbol, df, cross)
+        with self.lock:
+            features = self.frames.get(key)
+            if features is not None:
+                self.frames.move_to_end(key)
+                self.hits += 1
+                return features
+        spill_file = self._spill_file(key)
+        if os.path.exists(spill_file):
+            features = pd.read_pickle(spill_file)
+            self.hits += 1
+        else:
+            if COMPACT_FEATURES:
+                with stage("compact_indicators", rows=len(df)):
+                    features = compact_indicators(df)
+            else:
+                with stage("add_technical_indicators", rows=len(df)):
+                    features = add_technical_indicators(df[BAR_COLUMNS].copy())
+            if cross is not None:
+                features = add_cross_asset_columns(stock_symbol, features, cross)
+            self.misses += 1
+            self._spill(key, features)
+        self._remember(key, features)
+        return features
+
+    def clear(self):
+        with self.lock:
+            self.frames.clear()
+            self.nbytes = 0
+
+FEATURE_STORE = FeatureStore()
+
+def get_features(stock_symbol, df):
+    # Shared read-only frame: callers must copy before modifying it
+    with stage("get_features", rows=len(df)):
+        return FEATURE_STORE.get(stock_symbol, df)
+
+# Step 1f: Compact feature matrices
+# Opt-in through COMPACT_FEATURES (or --compact). Indicators come from the panel
+# engine, already float32. Prices are stored as float32 and volume as the
+# smallest unsigned integer that holds it, rounded to whole units. Warm-up rows
+# are removed with one mask, not dropna. feature_matrix fills a single
+# contiguous X block one column at a time, so no float64 frame or .values copy
+# is built on the way to a model.
+COMPACT_FEATURES = False
+
+def _volume_dtype(volume):
+    return np.min_scalar_type(int(np.nanmax(volume))) if len(volume) else np.uint8
+
+def compact_indicators(df):
+    close = df['Close'].values
+    panel = compute_indicator_panel(close[np.newaxis])[:, 0]
+    valid = ~(np.isnan(panel).any(axis=0) | np.isnan(df[BAR_COLUMNS].values).any(axis=1))
+    columns = {name: df[name].values[valid].astype(np.float32) for name in ['Open', 'High', 'Low', 'Close']}
+    volume = np.rint(df['Volume'].values[valid])
+    columns['Volume'] = volume.astype(_volume_dtype(volume))
+    columns.update((name, panel[i, valid]) for i, name in enumerate(INDICATOR_COLUMNS))
+    return pd.DataFrame(columns, index=df.index[valid], copy=False)
+
+def feature_matrix(features, dtype=None):
+    # One C-contiguous (rows x feature_columns()) block, float32 in compact mode
+    dtype = dtype or (np.float32 if COMPACT_FEATURES else np.float64)
+    columns = feature_columns()
+    X = np.empty((len(features), len(columns)), dtype=dtype)
+    for j, name in enumerate(columns):
+        X[:, j] = features[name].values
+    return X
+
+def _feature_bytes(features, X, y):
+    return int(features.memory_usage(deep=True).sum()) + X.nbytes + y.nbytes
+
+def benchmark_feature_memory(n_days=1260):
+    global COMPACT_FEATURES
+    bars = FixtureSource().fetch("memory").tail(n_days)
+    compact = COMPACT_FEATURES
+    results = {}
+    try:
+        for label, compact_mode in [("float64", False), ("compact", True)]:
+            COMPACT_FEATURES = compact_mode
+            tracemalloc.start()
+            features = compact_indicators(bars) if COMPACT_FEATURES else add_technical_indicators(bars.copy())
+            X, y = _training_arrays(features)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            results[label] = (_feature_bytes(features, X, y), peak)
+            print(f"{label:>8}: features + X/y {results[label][0] / 1e6:.2f} MB retained, {peak / 1e6:.2f} MB peak while building")
+    finally:
+        COMPACT_FEATURES = compact
+    print(f"Compact mode keeps {results['float64'][0] / results['compact'][0]:.1f}x less per symbol "
+          f"({n_days} days, {len(FEATURE_COLUMNS)} features)")
+    return results
+
+def load_close_panel(symbols, column='Close'):
+    # Align cached bars for many symbols on the union of their dates
+    frames = {symbol: scrape_data(symbol, refresh=False)[column] for symbol in symbols}
+    panel = pd.DataFrame(frames).sort_index()
+    return panel.index, np.ascontiguousarray(panel.values.T)
+
+def benchmark_indicators(n_symbols=500, n_days=1260):
+    source = FixtureSource()
+    frames = [source.fetch(f"sym{i:04d}").tail(n_days) for i in range(n_symbols)]
+    close = np.stack([frame['Close'].values for frame in frames])
+
+    start = time.perf_counter()
+    per_frame = [add_technical_indicators(frame.copy()) for frame in frames]
+    frame_elapsed = time.perf_counter() - start
+
+    out = np.empty((len(INDICATOR_COLUMNS), n_symbols, n_days), dtype=np.float32)
+    start = time.perf_counter()
+    compute_indicator_panel(close, out=out)
+    panel_elapsed = time.perf_counter() - start
+
+    # add_technical_indicators drops warm-up rows, so compare the tail it keeps
+    kept = per_frame[0].shape[0]
+    expected = per_frame[0][INDICATOR_COLUMNS].values
+    max_error = np.nanmax(np.abs(out[:, 0, -kept:].T - expected) / np.maximum(np.abs(expected), 1.0))
+    print(f"{n_symbols} symbols x {n_days} days: per-frame {frame_elapsed:.3f}s, panel {panel_elapsed:.3f}s "
+          f"({frame_elapsed / panel_elapsed:.1f}x faster), max relative difference {max_error:.2e}")
+    return frame_elapsed, panel_elapsed
+
+# Step 1h: Cross-asset features
+# Optional features relating each symbol to the rest of a universe, computed
+# on the (symbols x days) layout of the panel engine:
+#   Corr/Beta  - rolling correlation and beta of daily returns to an index
+#                (or to the equal-weighted universe when none is given)
+#   SectorRel  - multi-day return minus the mean of the symbol's sector
+#   Rank       - percentile rank of that return across the universe each day
+# Rolling covariances come from windowed sums of x, m, xm, x^2 and m^2, each a
+# difference of one cumulative sum, so every window adds the newest day and
+# drops the oldest and no pairwise .corr() is ever run. Symbols are processed
+# in blocks to bound the temporaries for very large universes.
+CROSS_WINDOW = 60
+RELATIVE_WINDOW = 20
+CROSS_ASSET_COLUMNS = [f'Corr{CROSS_WINDOW}', f'Beta{CROSS_WINDOW}', f'SectorRel{RELATIVE_WINDOW}', f'Rank{RELATIVE_WINDOW}']
+
+def _window_sums(values, window):
+    csum = np.zeros((values.shape[0], values.shape[1] + 1))
+    np.cumsum(values, axis=1, out=csum[:, 1:])
+    out = np.full(values.shape, np.nan)
+    out[:, window - 1:] = csum[:, window:] - csum[:, :-window]
+    return out
+
+def rolling_beta_corr(returns, market, window=CROSS_WINDOW):
+    # Windows with a missing day on either side stay NaN, like pandas rolling()
+    valid = ~np.isnan(returns) & ~np.isnan(market)
+    x = np.where(valid, returns, 0.0)
+    m = np.where(valid, market, 0.0)
+    full = _window_sums(valid.astype(np.float64), window) == window
+    sx, sm = _window_sums(x, window), _window_sums(m, window)
+    # The 1/(n - 1) factors cancel in both ratios
+    cov = _window_sums(x * m, window) - sx * sm / window
+    var_x = _window_sums(x * x, window) - sx * sx / window
+    var_m = _window_sums(m * m, window) - sm * sm / window
+    with np.errstate(divide='ignore', invalid='ignore'):
+        beta = np.where(full, cov / var_m, np.nan)
+        corr = np.where(full, cov / np.sqrt(var_x * var_m), np.nan)
+    return corr, beta
+
+def _cross_section_rank(values):
+    # Percentile (0..1) of each symbol among the symbols with a value that day
+    missing = np.isnan(values)
+    order = np.argsort(np.where(missing, np.inf, values), axis=0, kind='stable')
+    ranks = np.empty(values.shape)
+    np.put_along_axis(ranks, order, np.broadcast_to(np.arange(values.shape[0])[:, np.newaxis], values.shape).astype(np.float64), axis=0)
+    counts = (~missing).sum(axis=0)
+    ranks /= np.maximum(counts - 1, 1)
+    ranks[missing] = np.nan
+    return ranks
+
+def compute_cross_asset_panel(close, index_close=None, sector_codes=None, out=None, block_size=512):
+    # sector_codes: one integer per symbol (-1 = no sector, compared with the whole universe)
+    close = np.asarray(close, dtype=np.float64)
+    n_symbols, n_days = close.shape
+    if out is None:
+        out = np.empty((len(CROSS_ASSET_COLUMNS), n_symbols, n_days), dtype=np.float32)
+    elif out.shape != (len(CROSS_ASSET_COLUMNS), n_symbols, n_days):
+        raise ValueError(f"Output block must have shape {(len(CROSS_ASSET_COLUMNS), n_symbols, n_days)}, got {out.shape}.")
+    returns = np.full(close.shape, np.nan)
+    returns[:, 1:] = close[:, 1:] / close[:, :-1] - 1
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        if index_close is None:
+            market = np.nanmean(returns, axis=0)
+        else:
+            index_close = np.asarray(index_close, dtype=np.float64)
+            market = np.concatenate([[np.nan], index_close[1:] / index_close[:-1] - 1])
+        for lo in range(0, n_symbols, block_size):
+            out[0, lo:lo + block_size], out[1, lo:lo + block_size] = rolling_beta_corr(returns[lo:lo + block_size], market)
+
+        period = np.full(close.shape, np.nan)
+        period[:, RELATIVE_WINDOW:] = close[:, RELATIVE_WINDOW:] / close[:, :-RELATIVE_WINDOW] - 1
+        codes = np.full(n_symbols, -1) if sector_codes is None else np.asarray(sector_codes)
+        benchmark = np.empty(close.shape)
+        benchmark[:] = np.nanmean(period, axis=0)
+        for code in np.unique(codes[codes >= 0]):
+            members = codes == code
+            benchmark[members] = np.nanmean(period[members], axis=0)
+    out[2] = period - benchmark
+    out[3] = _cross_section_rank(period)
+    return out
+
+def cross_asset_features(symbols, index_symbol=None, sectors=None):
+    # Returns (dates, panel) for the cached bars of `symbols`; sectors maps symbol -> sector name
+    symbols = list(symbols)
+    dates, close = load_close_panel(symbols + ([index_symbol] if index_symbol else []))
+    index_close = None
+    if index_symbol:
+        close, index_close = close[:-1], close[-1]
+    sector_codes = None
+    if sectors:
+        names = {name: code for code, name in enumerate(sorted(set(sectors.values())))}
+        sector_codes = [names.get(sectors.get(symbol), -1) for symbol in symbols]
+    return dates, compute_cross_asset_panel(close, index_close, sector_codes)
+
+def cross_asset_frame(dates, panel, symbols, stock_symbol):
+    # One symbol's cross-asset columns, ready to join onto its feature frame
+    row = list(symbols).index(stock_symbol)
+    return pd.DataFrame(panel[:, row].T, index=pd.DatetimeIndex(dates, name="Date"), columns=CROSS_ASSET_COLUMNS)
+
+# Cross-asset columns as model features (opt-in)
+# use_cross_asset_features(universe) appends CROSS_ASSET_COLUMNS to every
+# daily feature frame. The universe panel is computed once per state of its
+# members' cached bars (row count and last date from the store metadata).
+# That state is part of the feature store and model keys, so features and
+# models are rebuilt when any member's bars change. The first CROSS_WINDOW
+# days have no correlation or beta and are dropped.
+CROSS_ASSET_UNIVERSE = None
+_cross_asset_panels = {}
+
+def use_cross_asset_features(symbols, index_symbol=None, sectors=None):
+    # Call with no symbols to turn the columns off again
+    global CROSS_ASSET_UNIVERSE
+    symbols = sorted(dict.fromkeys(s.strip().lower() for s in symbols or [] if s.strip()))
+    CROSS_ASSET_UNIVERSE = None
+    if symbols:
+        CROSS_ASSET_UNIVERSE = {"symbols": symbols, "index": index_symbol.lower() if index_symbol else None,
+                                "sectors": {symbol.lower(): sector for symbol, sector in sectors.items()} if sectors else None}
+    _cross_asset_panels.clear()
+
+def feature_columns():
+    return FEATURE_COLUMNS + CROSS_ASSET_COLUMNS if CROSS_ASSET_UNIVERSE else FEATURE_COLUMNS
+
+def cross_asset_config():
+    # The universe plus a fingerprint of its cached bars, or None when the columns are off
+    if not CROSS_ASSET_UNIVERSE:
+        return None
+    members = CROSS_ASSET_UNIVERSE["symbols"] + ([CROSS_ASSET_UNIVERSE["index"]] if CROSS_ASSET_UNIVERSE["index"] else [])
+    state = []
+    for symbol in members:
+        meta = _read_cache_meta(symbol)
+        if meta is None or meta["rows"] == 0 or _cache_is_stale(meta):
+            # Members are refreshed like the symbol itself, so the panel reaches its latest bar
+            scrape_data(symbol)
+            meta = _read_cache_meta(symbol)
+        state.append([symbol, meta.get("rows"), meta.get("last_date"), meta.get("covered_from")])
+    return dict(CROSS_ASSET_UNIVERSE, bars=_config_fingerprint(state))
+
+def add_cross_asset_columns(stock_symbol, features, config):
+    if "@" in stock_symbol:
+        # Intraday keys look like symbol@5m (see bar_key)
+        raise ValueError("Cross-asset features are daily; turn them off for intraday intervals.")
+    if stock_symbol not in config["symbols"]:
+        raise ValueError(f"{stock_symbol.upper()} is not in the cross-asset universe.")
+    key = _config_fingerprint(config)
+    if key not in _cross_asset_panels:
+        _cross_asset_panels.clear()
+        with stage("cross_asset_features", rows=len(config["symbols"])):
+            _cross_asset_panels[key] = cross_asset_features(config["symbols"], config["index"], config["sectors"])
+    dates, panel = _cross_asset_panels[key]
+    # Days a member has no bar for (a failed refresh, a different holiday
+    # calendar) carry the last values forward, so the symbol's latest row is
+    # always kept; only the warm-up rows at the start are dropped
+    cross = cross_asset_frame(dates, panel, config["symbols"], stock_symbol).reindex(features.index).ffill()
+    joined = features.join(cross)
+    joined = joined[cross.notna().all(axis=1).values]
+    if joined.empty:
+        raise ValueError(f"{stock_symbol.upper()} has no cross-asset history yet (needs {CROSS_WINDOW} days shared with the universe).")
+    return joined
+
+def benchmark_cross_asset(n_symbols=2000, n_days=1260, n_pandas=100):
+    source = FixtureSource()
+    close = np.stack([source.fetch(f"sym{i:04d}")['Close'].values[-n_days:] for i in range(n_symbols)])
+    index_close = source.fetch("index")['Close'].values[-n_days:]
+
+    start = time.perf_counter()
+    panel = compute_cross_asset_panel(close, index_close)
+    panel_elapsed = time.perf_counter() - start
+
+    # Per-symbol pandas rolling corr/cov for a subset, scaled up to the universe
+    returns = pd.DataFrame(close[:n_pandas].T).pct_change()
+    market = pd.Series(index_close).pct_change()
+    start = time.perf_counter()
+    corr = pd.DataFrame({i: returns[i].rolling(CROSS_WINDOW).corr(market) for i in returns})
+    beta = pd.DataFrame({i: returns[i].rolling(CROSS_WINDOW).cov(market) / market.rolling(CROSS_WINDOW).var() for i in returns})
+    pandas_elapsed = (time.perf_counter() - start) * n_symbols / n_pandas
+
+    error = max(np.nanmax(np.abs(panel[0, :n_pandas] - corr.values.T)), np.nanmax(np.abs(panel[1, :n_pandas] - beta.values.T)))
+    print(f"{n_symbols} symbols x {n_days} days: rolling-sum panel {panel_elapsed:.2f}s, "
+          f"pandas rolling corr/cov ~{pandas_elapsed:.2f}s ({pandas_elapsed / panel_elapsed:.1f}x), max difference {error:.1e}")
+    return panel_elapsed, pandas_elapsed
+
 # Step 2: Machine Learning Model for Stock Price Prediction
-def train_model(df, model_name):
-    model_file = os.path.join(MODEL_DIR, f"{df.name}_{model_name}.pkl")
+# Default hyperparameters per model; they are part of the registry key, so
+# changing them trains (and stores) a separate model.
+MODEL_PARAMS = {
+    "Linear Regression": {},
+    "Random Forest": {"n_estimators": 100, "max_depth": 16, "min_samples_leaf": 2},
+    "LSTM": {"epochs": 50, "batch_size": 32, "lookback": 30},
+    "Online SGD": {"epochs": 5, "alpha": 1e-4},
+    "Incremental Forest": {"n_estimators": 100, "trees_per_update": 10, "max_trees": 200, "update_window": 250},
+    "Incremental LSTM": {"epochs": 50, "batch_size": 32, "lookback": 30, "fine_tune_epochs": 5, "update_window": 250},
+}
+
+# Parameters found by tune() are saved per symbol and override the defaults
+def _tuned_params_file(stock_symbol):
+    return os.path.join(MODEL_DIR, stock_symbol, "tuned_params.json")
+
+def model_params(stock_symbol, model_name):
+    params = dict(MODEL_PARAMS.get(model_name, {}))
+    tuned_file = _tuned_params_file(stock_symbol)
+    if os.path.exists(tuned_file):
+        with open(tuned_file) as f:
+            params.update(json.load(f).get(model_name, {}))
+    return params
+
+# Step 2a: Model registry
+# Trained models live under models/{symbol}/{model}-{params hash}-{data hash}/
+# with a meta.json (MSE, params, fingerprint). sklearn models are pickled,
+# compact forests are written with joblib and memory-mapped on load, and the
+# LSTM uses native Keras saving. Loaded models are kept in a small LRU so
+# switching symbols in the GUI does not reload them from disk.
+class ModelRegistry:
+    def __init__(self, root=None, max_loaded=8):
+        self.root = root
+        self.max_loaded = max_loaded
+        self.loaded = OrderedDict()
+        self.lock = threading.Lock()
+
+    def _root(self):
+        return self.root or MODEL_DIR
+
+    def entry_dir(self, stock_symbol, model_name, params, fingerprint):
+        slug = model_name.lower().replace(" ", "_")
+        params_hash = hashlib.blake2b(json.dumps(params, sort_keys=True).encode(), digest_size=6).hexdigest()
+        return os.path.join(self._root(), stock_symbol, f"{slug}-{params_hash}-{fingerprint[:16]}")
+
+    def _remember(self, path, entry):
+        with self.lock:
+            self.loaded[path] = entry
+            self.loaded.move_to_end(path)
+            while len(self.loaded) > self.max_loaded:
+                self.loaded.popitem(last=False)
+
+    def get(self, stock_symbol, model_name, params, fingerprint):
+        return self._load(self.entry_dir(stock_symbol, model_name, params, fingerprint))
+
+    def read_meta(self, path):
+        meta_file = os.path.join(path, "meta.json")
+        if not os.path.exists(meta_file):
+            return None
+        with open(meta_file) as f:
+            return json.load(f)
+
+    def latest(self, stock_symbol, model_name, params):
+        # Most recent entry for this symbol/model/params, whatever data it was trained on
+        parent, name = os.path.split(self.entry_dir(stock_symbol, model_name, params, ""))
+        if not os.path.isdir(parent):
+            return None
+        candidates = []
+        for other in os.listdir(parent):
+            if other.startswith(name) and not other.endswith(".tmp"):
+                meta = self.read_meta(os.path.join(parent, other))
+                if meta is not None:
+                    candidates.append((meta["created"], os.path.join(parent, other), meta))
+        if not candidates:
+            return None
+        _, path, meta = max(candidates, key=lambda candidate: candidate[0])
+        return self._load(path), meta
+
+    def _load(self, path):
+        with self.lock:
+            if path in self.loaded:
+                self.loaded.move_to_end(path)
+                return self.loaded[path]
+        meta = self.read_meta(path)
+        if meta is None:
+            return None
+        with stage("load_model"):
+            if meta["format"] == "keras":
+                model = tf.keras.models.load_model(os.path.join(path, "model.keras"))
+            elif meta["format"] == "joblib":
+                import joblib
+                model = joblib.load(os.path.join(path, "model.joblib"), mmap_mode='r')
+            else:
+                with open(os.path.join(path, "model.pkl"), 'rb') as f:
+                    model = pickle.load(f)
+            scaler = None
+            if os.path.exists(os.path.join(path, "scaler.pkl")):
+                with open(os.path.join(path, "scaler.pkl"), 'rb') as f:
+                    scaler = pickle.load(f)
+        entry = (model, meta["mse"], scaler)
+        self._remember(path, entry)
+        return entry
+
+    def put(self, stock_symbol, model_name, params, fingerprint, model, mse, scaler=None, extra=None):
+        path = self.entry_dir(stock_symbol, model_name, params, fingerprint)
+        tmp_path = path + ".tmp"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+        if _is_lstm(model_name):
+            model.save(os.path.join(tmp_path, "model.keras"))
+            model_format = "keras"
+        elif isinstance(model, CompactForest):
+            import joblib
+            joblib.dump(model, os.path.join(tmp_path, "model.joblib"))
+            model_format = "joblib"
+        else:
+            with open(os.path.join(tmp_path, "model.pkl"), 'wb') as f:
+                pickle.dump(model, f)
+            model_format = "pickle"
+        if scaler is not None:
+            with open(os.path.join(tmp_path, "scaler.pkl"), 'wb') as f:
+                pickle.dump(scaler, f)
+        meta = {"symbol": stock_symbol, "model": model_name, "params": params, "fingerprint": fingerprint,
+                "mse": float(mse), "format": model_format, "created": time.time(), **(extra or {})}
+        with open(os.path.join(tmp_path, "meta.json"), 'w') as f:
+            json.dump(meta, f)
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(tmp_path, path)
+        self._prune(path)
+        if model_format == "joblib":
+            # Serve the memory-mapped copy so the fitted arrays can be freed
+            import joblib
+            model = joblib.load(os.path.join(path, "model.joblib"), mmap_mode='r')
+        self._remember(path, (model, mse, scaler))
+
+    def _prune(self, path):
+        # Models trained on older data for the same symbol/model/params are superseded
+        parent, name = os.path.split(path)
+        prefix = name.rsplit("-", 1)[0] + "-"
+        for other in os.listdir(parent):
+            if other != name and other.startswith(prefix) and not other.endswith(".tmp"):
+                shutil.rmtree(os.path.join(parent, other), ignore_errors=True)
+                with self.lock:
+                    self.loaded.pop(os.path.join(parent, other), None)
+
+MODEL_REGISTRY = ModelRegistry()
+
+def _training_arrays(features):
+    # Target is the next day's close, so the latest row has no label
+    return feature_matrix(features.iloc[:-1]), features['Close'].values[1:]
+
+# LSTM sequence data
+# Each sample is the `lookback` feature rows ending at day t, labelled with the
+# next close. sliding_window_view exposes the windows as strided views of the
+# scaled feature matrix, and the tf.data pipeline only copies one batch at a
+# time, so memory stays flat as the lookback grows. Features and target get
+# their own scalers, kept together with the lookback as the model's "scaler".
+def lstm_windows(X_scaled, lookback):
+    return sliding_window_view(X_scaled, (lookback, X_scaled.shape[1]))[:, 0]
+
+def _fit_lstm_scaler(X_train, y_train, lookback):
+    from sklearn.preprocessing import MinMaxScaler
+    return {"x": MinMaxScaler().fit(X_train), "y": MinMaxScaler().fit(y_train.reshape(-1, 1)), "lookback": lookback}
+
+def lstm_dataset(windows, targets=None, batch_size=32, shuffle=False):
+    def batches():
+        order = np.random.permutation(len(windows)) if shuffle else np.arange(len(windows))
+        for start in range(0, len(windows), batch_size):
+            index = order[start:start + batch_size]
+            x = windows[index].astype(np.float32)
+            yield x if targets is None else (x, targets[index].astype(np.float32))
+    x_spec = tf.TensorSpec((None,) + windows.shape[1:], tf.float32)
+    signature = x_spec if targets is None else (x_spec, tf.TensorSpec((None, 1), tf.float32))
+    # from_generator cannot know its length; stating it lets Keras size epochs
+    # and progress bars instead of warning that the input ran out of data.
+    # Shuffling happens here, so callers pass shuffle=False to fit.
+    n_batches = -(-len(windows) // batch_size)
+    dataset = tf.data.Dataset.from_generator(batches, output_signature=signature)
+    return dataset.apply(tf.data.experimental.assert_cardinality(n_batches)).prefetch(tf.data.AUTOTUNE)
+
+def _holdout_rows(n_rows, model_name, params):
+    # Latest rows (LSTM: windows) fit_model scores the model on instead of training on it
+    if _is_lstm(model_name):
+        n_rows -= params["lookback"] - 1
+    return int(np.ceil(n_rows * 0.2))
+
+def fit_model(X, y, model_name, params):
+    from sklearn.metrics import mean_squared_error
     scaler = None
-    if os.path.exists(model_file) and model_name != "LSTM":
-        with open(model_file, 'rb') as f:
-            model, mse = pickle.load(f)
+    if _is_lstm(model_name):
+        lookback = params["lookback"]
+        split = len(X) - lookback + 1 - _holdout_rows(len(X), model_name, params)
+        # Scalers only see the training rows
+        scaler = _fit_lstm_scaler(X[:split + lookback - 1], y[:split + lookback - 1], lookback)
+        windows = lstm_windows(scaler["x"].transform(X), lookback)
+        targets = scaler["y"].transform(y.reshape(-1, 1))[lookback - 1:]
+        model = create_lstm_model((lookback, X.shape[1]), **_lstm_architecture(params))
+        job = current_job()
+        callbacks = [_keras_progress_callback(job, params["epochs"])] if job is not None else []
+        model.fit(lstm_dataset(windows[:split], targets[:split], params["batch_size"], shuffle=True), epochs=params["epochs"], callbacks=callbacks, shuffle=False)
+        if job is not None:
+            job.check_cancelled()
+        predictions = scaler["y"].inverse_transform(model.predict(lstm_dataset(windows[split:], batch_size=params["batch_size"])))
+        mse = mean_squared_error(y[lookback - 1:][split:], predictions.ravel())
     else:
-        df = add_technical_indicators(df)
-        df['Prediction'] = df['Close'].shift(-1)
-        df.dropna(inplace=True)
-    
-        feature_columns = ['Open', 'High', 'Low', 'Volume', 'MA5', 'MA10', 'MA20', 'RSI', 'MACD', 'Signal'] + [f'Close_lag_{lag}' for lag in range(1,6)]
-        X = df[feature_columns].values
-        y = df['Prediction'].values
-
-        if model_name == 'LSTM':
-            scaler = MinMaxScaler(feature_range=(0, 1))
-            X = scaler.fit_transform(X)
-            y = scaler.fit_transform(y.reshape(-1, 1))
-            X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, shuffle=False)
-            X_train = X_train.reshape((X_train.shape[0], X_train.shape[1], 1))
-            X_test = X_test.reshape((X_test.shape[0], X_test.shape[1], 1))
-            model = create_lstm_model((X_train.shape[1], 1))
-            model.fit(X_train, y_train, batch_size=32, epochs=50)
-            predictions = model.predict(X_test)
-            mse = mean_squared_error(y_test, predictions)
-        else:
-            X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, shuffle=False)
-            ModelClass = AVAILABLE_MODELS.get(model_name)
-            if not ModelClass:
-                raise ValueError(f"Model {model_name} is not supported.")
-
-            model = ModelClass()
-            model.fit(X_train, y_train)
-            predictions = model.predict(X_test)
-            mse = mean_squared_error(y_test, predictions)
-
-        if model_name != 'LSTM':
-            with open(model_file, 'wb') as f:
-                pickle.dump((model, mse), f)
-    
+        split = len(X) - _holdout_rows(len(X), model_name, params)
+        X_train, X_test, y_train, y_test = X[:split], X[split:], y[:split], y[split:]
+        model = AVAILABLE_MODELS[model_name](**params)
+        model.fit(X_train, y_train)
+        if model_name in COMPACT_MODELS:
+            model = CompactForest.from_forest(model)
+        predictions = model.predict(X_test)
+        mse = mean_squared_error(y_test, predictions)
+    return model, mse, scaler
+
+# Incremental models
+# A model in INCREMENTAL_MODELS that is already in the registry is updated with
+# the rows labelled since it was last trained instead of being refit:
+#   Online SGD         - one partial_fit pass over the new rows
+#   Incremental Forest - trees_per_update new trees grown on the last
+#                        update_window rows, oldest trees dropped past max_trees
+#   Incremental LSTM   - fine_tune_epochs more epochs over the windows ending
+#                        in the last update_window rows, keeping the scalers
+# The reported MSE is prequential: each batch of new rows is scored before the
+# model sees it and folded into the running mean.
+def update_model(model, scaler, X, y, model_name, params, new_from):
+    recent = max(min(new_from, len(X) - params.get("update_window", 0)), 0)
+    if model_name == "Online SGD":
+        model.partial_fit(X[new_from:], y[new_from:])
+    elif model_name == "Incremental Forest":
+        model.set_params(warm_start=True, n_estimators=len(model.estimators_) + params["trees_per_update"])
+        model.fit(X[recent:], y[recent:])
+        if len(model.estimators_) > params["max_trees"]:
+            model.estimators_ = model.estimators_[-params["max_trees"]:]
+            model.n_estimators = len(model.estimators_)
+    elif model_name == "Incremental LSTM":
+        lookback = scaler["lookback"]
+        first = max(recent - lookback + 1, 0)
+        windows = lstm_windows(scaler["x"].transform(X[first:]), lookback)
+        targets = scaler["y"].transform(y[first:].reshape(-1, 1))[lookback - 1:]
+        model.fit(lstm_dataset(windows, targets, params["batch_size"], shuffle=True), epochs=params["fine_tune_epochs"], verbose=0, shuffle=False)
+    else:
+        raise ValueError(f"Model {model_name} cannot be updated incrementally.")
+    return model
+
+def _incremental_update(df, model_name, params, fingerprint, features):
+    latest = MODEL_REGISTRY.latest(df.name, model_name, params)
+    if latest is None or "trained_through" not in latest[1]:
+        return None
+    (model, mse, scaler), meta = latest
+    X, y = _training_arrays(features)
+    if meta.get("n_features", X.shape[1]) != X.shape[1]:
+        # Trained before cross-asset columns were turned on or off
+        return None
+    # Row i is labelled with the close of day i + 1, so rows up to the old last bar are already learned
+    new_from = int(features.index[1:].searchsorted(pd.Timestamp(meta["trained_through"]), side='right'))
+    if new_from >= len(X) or new_from < _history_rows(model_name, scaler):
+        return None
+    report_progress(f"Updating {model_name} with {len(X) - new_from} new rows")
+    history = new_from - _history_rows(model_name, scaler)
+    errors = predict_rows(model, scaler, model_name, X[history:]) - y[new_from:]
+    count = meta.get("mse_count", 0) + len(errors)
+    mse = (mse * meta.get("mse_count", 0) + float(np.sum(errors ** 2))) / count
+    with stage("update_model", rows=len(X) - new_from):
+        model = update_model(model, scaler, X, y, model_name, params, new_from)
+    MODEL_REGISTRY.put(df.name, model_name, params, fingerprint, model, mse, scaler,
+                       extra={"trained_through": str(features.index[-1]), "mse_count": count, "n_features": X.shape[1]})
+    return model, mse, scaler
+
+def _incremental_extra(features, model_name, params):
+    # A fresh fit has not learned its held-out rows, so the first update starts
+    # at them. They are re-scored there by the same model, so the holdout MSE
+    # is not counted twice: mse_count starts at zero.
+    if model_name not in INCREMENTAL_MODELS:
+        return None
+    n_rows = len(features) - 1
+    n_train = n_rows - _holdout_rows(n_rows, model_name, params)
+    return {"trained_through": str(features.index[n_train]), "mse_count": 0, "n_features": len(feature_columns())}
+
+def train_model(df, model_name, params=None):
+    if model_name not in AVAILABLE_MODELS:
+        raise ValueError(f"Model {model_name} is not supported.")
+    params = model_params(df.name, model_name) if params is None else dict(params)
+    with stage("train_model", rows=len(df)):
+        return _train_model(df, model_name, params)
+
+def _train_model(df, model_name, params):
+    fingerprint = model_fingerprint(df)
+    cached = MODEL_REGISTRY.get(df.name, model_name, params, fingerprint)
+    if cached is not None:
+        return cached
+
+    features = get_features(df.name, df)
+    if model_name in INCREMENTAL_MODELS:
+        updated = _incremental_update(df, model_name, params, fingerprint, features)
+        if updated is not None:
+            return updated
+    X, y = _training_arrays(features)
+    with stage("fit_model", rows=len(X)):
+        model, mse, scaler = fit_model(X, y, model_name, params)
+    MODEL_REGISTRY.put(df.name, model_name, params, fingerprint, model, mse, scaler,
+                       extra=_incremental_extra(features, model_name, params))
     return model, mse, scaler
 
+# Forest size benchmark: the old full-depth pickle against the compact format
+def _model_ram_bytes(model):
+    # Node arrays held in process memory; memory-mapped arrays live in the page cache
+    if isinstance(model, CompactForest):
+        arrays = (model.feature, model.threshold, model.children, model.value, model.roots)
+        return sum(array.nbytes for array in arrays if not isinstance(array, np.memmap))
+    return sum(state["nodes"].nbytes + state["values"].nbytes
+               for state in (estimator.tree_.__getstate__() for estimator in model.estimators_))
+
+def benchmark_forest(n_days=1260, n_models=20):
+    import joblib
+    from sklearn.metrics import mean_squared_error
+    bars = FixtureSource().fetch("forest").tail(n_days)
+    features = add_technical_indicators(bars.copy())
+    X, y = _training_arrays(features)
+    split = int(len(X) * 0.8)
+    variants = [("full pickle", {}, False), ("compact mmap", MODEL_PARAMS["Random Forest"], True)]
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for label, params, compact in variants:
+            model = _random_forest(random_state=42, **params).fit(X[:split], y[:split])
+            paths = [os.path.join(tmp_dir, f"{label.split()[0]}{i}.model") for i in range(n_models)]
+            for path in paths:
+                if compact:
+                    joblib.dump(CompactForest.from_forest(model), path)
+                else:
+                    with open(path, 'wb') as f:
+                        pickle.dump(model, f)
+            del model
+            start = time.perf_counter()
+            if compact:
+                models = [joblib.load(path, mmap_mode='r') for path in paths]
+            else:
+                models = []
+                for path in paths:
+                    with open(path, 'rb') as f:
+                        models.append(pickle.load(f))
+            load_seconds = (time.perf_counter() - start) / n_models
+            start = time.perf_counter()
+            predictions = models[0].predict(X[split:])
+            predict_seconds = time.perf_counter() - start
+            results[label] = {"file_mb": os.path.getsize(paths[0]) / 1e6, "load_ms": load_seconds * 1e3,
+                              "ram_mb": _model_ram_bytes(models[0]) / 1e6, "predict_ms": predict_seconds * 1e3,
+                              "mse": float(mean_squared_error(y[split:], predictions))}
+            print(f"{label:>12}: {results[label]['file_mb']:.2f} MB file, {results[label]['load_ms']:.1f} ms load, "
+                  f"{results[label]['ram_mb']:.2f} MB in RAM per model, {results[label]['predict_ms']:.1f} ms predict, "
+                  f"holdout MSE {results[label]['mse']:.4f}")
+    print(f"Compact models are {results['full pickle']['file_mb'] / results['compact mmap']['file_mb']:.1f}x smaller on disk "
+          f"({n_models} models loaded, {len(X)} rows)")
+    return results
+
+# Step 2b: Parallel model comparison
+# Feature matrices for every symbol are written once into a single .npy block
+# (features + target column). Workers open it with mmap_mode='r', so they all
+# read the same page-cache pages instead of each receiving a pickled copy.
+# "spawn" keeps TensorFlow safe in the workers.
+def _compare_worker(block_path, start, stop, stock_symbol, model_name, params, fingerprint, extra, registry_root):
+    block = np.load(block_path, mmap_mode='r')
+    X, y = block[start:stop, :-1], block[start:stop, -1]
+    model, mse, scaler = fit_model(X, y, model_name, params)
+    ModelRegistry(registry_root).put(stock_symbol, model_name, params, fingerprint, model, mse, scaler, extra=extra)
+    return stock_symbol, model_name, float(mse)
+
+def compare_models_parallel(symbols, model_names=None, max_workers=None, mp_context="spawn"):
+    model_names = list(model_names or AVAILABLE_MODELS.keys())
+    results = pd.DataFrame(np.nan, index=list(symbols), columns=model_names)
+    tasks = []
+    arrays = []
+    offset = 0
+    for stock_symbol in symbols:
+        report_progress(f"Loading {stock_symbol.upper()} data")
+        df = scrape_data(stock_symbol)
+        fingerprint = model_fingerprint(df)
+        features = get_features(stock_symbol, df)
+        X, y = _training_arrays(features)
+        span = None
+        for model_name in model_names:
+            params = model_params(stock_symbol, model_name)
+            cached = MODEL_REGISTRY.get(stock_symbol, model_name, params, fingerprint)
+            if cached is not None:
+                results.loc[stock_symbol, model_name] = cached[1]
+                continue
+            if span is None:
+                arrays.append(np.column_stack([X, y]))
+                span = (offset, offset + len(X))
+                offset += len(X)
+            tasks.append((span[0], span[1], stock_symbol, model_name, params, fingerprint,
+                          _incremental_extra(features, model_name, params)))
+
+    if tasks:
+        # Workers that are still running after a cancel keep the block mapped, so cleanup may have to wait for them
+        with tempfile.TemporaryDirectory(ignore_cleanup_errors=True) as tmp_dir:
+            block_path = os.path.join(tmp_dir, "features.npy")
+            np.save(block_path, np.concatenate(arrays))
+            del arrays
+            context = multiprocessing.get_context(mp_context)
+            pool = ProcessPoolExecutor(max_workers=max_workers, mp_context=context)
+            try:
+                futures = [pool.submit(_compare_worker, block_path, *task, MODEL_REGISTRY._root()) for task in tasks]
+                report_progress(f"Training {len(tasks)} models", 0.0)
+                for done, future in enumerate(as_completed_or_cancelled(futures), start=1):
+                    stock_symbol, model_name, mse = future.result()
+                    results.loc[stock_symbol, model_name] = mse
+                    report_progress(f"Trained {model_name} for {stock_symbol.upper()}", done / len(tasks))
+            except BaseException:
+                # Cancel (or a failed fit) drops the queued fits and returns
+                # without waiting for the ones already running
+                pool.shutdown(wait=False, cancel_futures=True)
+                raise
+            pool.shutdown()
+    return results
+
+# Step 2c: Walk-forward backtesting
+# Folds are index ranges over one precomputed feature block, so no fold
+# rebuilds indicators. Independent folds run on a process pool reading the
+# block through a memmap; with warm_start the folds run in order and each
+# model continues from the previous fold (extra trees for the forest, a few
+# fine-tuning epochs for the LSTM) instead of refitting from scratch.
+def walk_forward_splits(n_rows, n_folds=5, test_size=None, window="expanding", train_size=None):
+    test_size = test_size or n_rows // (n_folds + 1)
+    first_split = n_rows - n_folds * test_size
+    if window == "rolling":
+        train_size = train_size or first_split
+    elif window != "expanding":
+        raise ValueError(f"Unknown window type: {window}")
+    if first_split <= 0 or (train_size is not None and train_size > first_split):
+        raise ValueError("Not enough rows for the requested folds.")
+    folds = []
+    for fold in range(n_folds):
+        split = first_split + fold * test_size
+        train_start = split - train_size if window == "rolling" else 0
+        folds.append((train_start, split, split + test_size))
+    return folds
+
+def _backtest_fold(X, y, fold, model_name, params, model=None, scaler=None):
+    from sklearn.metrics import mean_squared_error
+    train_start, train_stop, test_stop = fold
+    X_train, y_train = X[train_start:train_stop], y[train_start:train_stop]
+    X_test, y_test = X[train_stop:test_stop], y[train_stop:test_stop]
+
+    start = time.perf_counter()
+    if _is_lstm(model_name):
+        lookback = params["lookback"]
+        if scaler is None:
+            scaler = _fit_lstm_scaler(X_train, y_train, lookback)
+        # Window i ends at row i + lookback - 1, so test windows may reach back into the training rows
+        windows = lstm_windows(scaler["x"].transform(X[:test_stop]), lookback)
+        targets = scaler["y"].transform(y[:test_stop].reshape(-1, 1))[lookback - 1:]
+        first = max(train_start, lookback - 1) - (lookback - 1)
+        epochs = params["epochs"] if model is None else params.get("warm_epochs", 5)
+        if model is None:
+            model = create_lstm_model((lookback, X.shape[1]), **_lstm_architecture(params))
+        train_windows = windows[first:train_stop - lookback + 1]
+        train_targets = targets[first:train_stop - lookback + 1]
+        fit_args = {}
+        if params.get("patience"):
+            # Early stopping on the latest tenth of the training windows
+            holdout = max(len(train_windows) // 10, 1)
+            fit_args["validation_data"] = lstm_dataset(train_windows[-holdout:], train_targets[-holdout:], params["batch_size"])
+            fit_args["callbacks"] = [tf.keras.callbacks.EarlyStopping(monitor="val_loss", patience=params["patience"], restore_best_weights=True)]
+            train_windows, train_targets = train_windows[:-holdout], train_targets[:-holdout]
+        model.fit(lstm_dataset(train_windows, train_targets, params["batch_size"], shuffle=True),
+                  epochs=epochs, verbose=0, shuffle=False, **fit_args)
+    else:
+        if model is not None and hasattr(model, "warm_start") and hasattr(model, "n_estimators"):
+            model.set_params(warm_start=True, n_estimators=model.n_estimators + params.get("warm_trees", 20))
+        else:
+            model = AVAILABLE_MODELS[model_name](**{k: v for k, v in params.items() if not k.startswith("warm_") and k != "patience"})
+        model.fit(X_train, y_train)
+    fit_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    if _is_lstm(model_name):
+        test_windows = windows[train_stop - lookback + 1:]
+        predictions = scaler["y"].inverse_transform(model.predict(lstm_dataset(test_windows, batch_size=params["batch_size"]), verbose=0)).ravel()
+    else:
+        predictions = model.predict(X_test)
+    predict_seconds = time.perf_counter() - start
+
+    result = {"train_start": train_start, "train_stop": train_stop, "test_stop": test_stop,
+              "mse": float(mean_squared_error(y_test, predictions)),
+              "fit_seconds": fit_seconds, "predict_seconds": predict_seconds}
+    return result, model, scaler
+
+def _backtest_worker(block_path, fold, model_name, params):
+    block = np.load(block_path, mmap_mode='r')
+    result, _, _ = _backtest_fold(block[:, :-1], block[:, -1], fold, model_name, params)
+    return result
+
+def backtest(stock_symbol, model_name, n_folds=5, window="expanding", train_size=None, test_size=None,
+             warm_start=False, params=None, max_workers=None, mp_context="spawn"):
+    if model_name not in AVAILABLE_MODELS:
+        raise ValueError(f"Model {model_name} is not supported.")
+    params = model_params(stock_symbol, model_name) if params is None else dict(params)
+    X, y = _training_arrays(get_features(stock_symbol, scrape_data(stock_symbol)))
+    folds = walk_forward_splits(len(X), n_folds=n_folds, test_size=test_size, window=window, train_size=train_size)
+
+    start = time.perf_counter()
+    if warm_start:
+        results, model, scaler = [], None, None
+        for fold in folds:
+            result, model, scaler = _backtest_fold(X, y, fold, model_name, params, model, scaler)
+            results.append(result)
+    else:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            block_path = os.path.join(tmp_dir, "features.npy")
+            np.save(block_path, np.column_stack([X, y]))
+            context = multiprocessing.get_context(mp_context)
+            with ProcessPoolExecutor(max_workers=max_workers, mp_context=context) as pool:
+                results = list(pool.map(_backtest_worker, [block_path] * len(folds), folds,
+                                        [model_name] * len(folds), [params] * len(folds)))
+    wall_seconds = time.perf_counter() - start
+
+    report = pd.DataFrame(results)
+    report.index.name = "fold"
+    summary = {"symbol": stock_symbol, "model": model_name, "window": window, "warm_start": warm_start,
+               "mean_mse": float(report["mse"].mean()), "wall_seconds": wall_seconds,
+               "fit_seconds": float(report["fit_seconds"].sum()), "predict_seconds": float(report["predict_seconds"].sum())}
+    return report, summary
+
+# Step 2d: Compiled LSTM inference
+# Keras model.predict rebuilds its data adapter and step function on every
+# call. For serving we wrap the model once in a tf.function with a fixed
+# (batch, lookback, features) signature, so every later call of any batch
+# size reuses one traced graph. Models can also be exported to TFLite (or
+# ONNX when tf2onnx is installed) and served through TFLitePredictor.
+# The traced function holds only a weak reference to its model; a closure
+# over the model itself would keep the cache key alive and leak every model.
+_COMPILED_PREDICTORS = weakref.WeakKeyDictionary()
+
+def compiled_predictor(model):
+    predictor = _COMPILED_PREDICTORS.get(model)
+    if predictor is None:
+        signature = [tf.TensorSpec((None,) + tuple(model.input_shape[1:]), tf.float32)]
+        model_ref = weakref.ref(model)
+        predictor = tf.function(lambda x: model_ref()(x, training=False), input_signature=signature)
+        _COMPILED_PREDICTORS[model] = predictor
+    return predictor
+
+def compiled_predict(model, X):
+    return compiled_predictor(model)(tf.convert_to_tensor(np.asarray(X, dtype=np.float32))).numpy()
+
+def _unrolled_copy(model):
+    # The converter cannot freeze the variables read inside the LSTM's while
+    # loop; an unrolled clone with the same weights converts to plain ops
+    config = model.get_config()
+    for layer in config['layers']:
+        if layer['class_name'] == 'LSTM':
+            layer['config']['unroll'] = True
+    clone = tf.keras.Sequential.from_config(config)
+    clone.set_weights(model.get_weights())
+    return clone
+
+def export_lstm(model, path, export_format="tflite"):
+    if export_format == "tflite":
+        converter = tf.lite.TFLiteConverter.from_keras_model(_unrolled_copy(model))
+        with open(path, 'wb') as f:
+            f.write(converter.convert())
+    elif export_format == "onnx":
+        try:
+            import tf2onnx
+        except ImportError:
+            raise ImportError("ONNX export requires the tf2onnx package (pip install tf2onnx).")
+        signature = [tf.TensorSpec((None,) + tuple(model.input_shape[1:]), tf.float32, name="windows")]
+        tf2onnx.convert.from_keras(model, input_signature=signature, output_path=path)
+    else:
+        raise ValueError(f"Unknown export format: {export_format}")
+    return path
+
+class TFLitePredictor:
+    # Drop-in replacement for the Keras model in predict_rows
+    def __init__(self, path):
+        self.interpreter = tf.lite.Interpreter(model_path=path)
+        self.input_index = self.interpreter.get_input_details()[0]['index']
+        self.output_index = self.interpreter.get_output_details()[0]['index']
+        self.batch_size = None
+
+    def predict(self, X, verbose=0):
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if self.batch_size != len(X):
+            self.interpreter.resize_tensor_input(self.input_index, X.shape)
+            self.interpreter.allocate_tensors()
+            self.batch_size = len(X)
+        self.interpreter.set_tensor(self.input_index, X)
+        self.interpreter.invoke()
+        return self.interpreter.get_tensor(self.output_index).copy()
+
+def benchmark_lstm_inference(n_rows=256, repeats=20, lookback=30):
+    model = create_lstm_model((lookback, len(FEATURE_COLUMNS)))
+    windows = np.random.default_rng(0).random((n_rows, lookback, len(FEATURE_COLUMNS)), dtype=np.float32)
+    candidates = [("keras predict", lambda X: model.predict(X, verbose=0)), ("tf.function", lambda X: compiled_predict(model, X))]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        try:
+            tflite_model = TFLitePredictor(export_lstm(model, os.path.join(tmp_dir, "lstm.tflite")))
+            candidates.append(("tflite", tflite_model.predict))
+        except Exception as e:
+            print(f"TFLite export unavailable: {e}")
+
+        for label, predict in candidates:
+            predict(windows[:1])
+            predict(windows)
+            timings = {}
+            for name, batch in [("single row", windows[:1]), (f"batch of {n_rows}", windows)]:
+                start = time.perf_counter()
+                for _ in range(repeats):
+                    predict(batch)
+                timings[name] = (time.perf_counter() - start) / repeats * 1000
+            start = time.perf_counter()
+            for row in range(n_rows):
+                predict(windows[row:row + 1])
+            timings["row by row"] = (time.perf_counter() - start) * 1000
+            print(f"{label:>14}: " + ", ".join(f"{name} {ms:.2f} ms" for name, ms in timings.items()))
+
+# Step 2e: Headless prediction
+# Prediction without Tk: the GUI callbacks, the batch API and the CLI all go
+# through predict_symbol, which makes a single batched model.predict call for
+# every row it needs.
+def _history_rows(model_name, scaler):
+    # Extra feature rows needed before the first predicted row
+    return scaler["lookback"] - 1 if _is_lstm(model_name) else 0
+
+def predict_rows(model, scaler, model_name, X):
+    # For the LSTM, X must include the lookback history; one prediction per complete window is returned
+    with stage("predict", rows=len(X)):
+        if _is_lstm(model_name):
+            X = lstm_windows(scaler["x"].transform(X), scaler["lookback"])
+            predictions = compiled_predict(model, X) if isinstance(model, tf.keras.Model) else model.predict(X)
+        else:
+            predictions = model.predict(X)
+        if _is_lstm(model_name):
+            predictions = scaler["y"].inverse_transform(np.asarray(predictions).reshape(-1, 1))
+        return np.asarray(predictions, dtype=np.float64).ravel()
+
+# Prediction cache
+# Predictions are keyed by symbol, model version (the registry entry: model,
+# params and training-data fingerprint), feature config and last bar. An entry
+# holds the longest window computed so far, so Save Prediction after Predict
+# (or a batch run after either) slices the stored tail without loading the
+# model. Recent entries stay in memory; all of them are also written to
+# cache/predictions/. Entries expire after ttl seconds, and the least recently
+# used files are evicted past max_entries.
+PREDICTION_TTL_SECONDS = CACHE_REFRESH_SECONDS
+
+class PredictionCache:
+    def __init__(self, max_entries=1024, max_loaded=128, ttl=None, cache_dir=None):
+        self.max_entries = max_entries
+        self.max_loaded = max_loaded
+        self.ttl = PREDICTION_TTL_SECONDS if ttl is None else ttl
+        self.cache_dir = cache_dir
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def _cache_dir(self):
+        return self.cache_dir or os.path.join(CACHE_DIR, "predictions")
+
+    def _cache_file(self, key):
+        return os.path.join(self._cache_dir(), key + ".pkl")
+
+    def key(self, stock_symbol, model_name, params, df):
+        model_version = os.path.basename(MODEL_REGISTRY.entry_dir(stock_symbol, model_name, params, model_fingerprint(df)))
+        parts = [stock_symbol, model_version, FEATURE_STORE.key(stock_symbol, df, cross_asset_config())[2], df.index[-1].isoformat()]
+        return hashlib.blake2b("|".join(parts).encode(), digest_size=16).hexdigest()
+
+    def get(self, key, window=1):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+        cache_file = self._cache_file(key)
+        if entry is None and os.path.exists(cache_file):
+            with open(cache_file, 'rb') as f:
+                entry = pickle.load(f)
+        if entry is not None and time.time() - entry["created"] > self.ttl:
+            self._discard(key)
+            entry = None
+        if entry is None or len(entry["predictions"]) < window:
+            self.misses += 1
+            return None
+        if os.path.exists(cache_file):
+            # mtime is the recency used for on-disk LRU eviction
+            os.utime(cache_file)
+        self._remember(key, entry)
+        self.hits += 1
+        return entry["predictions"][-window:], entry["mse"]
+
+    def _remember(self, key, entry):
+        with self.lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_loaded:
+                self.entries.popitem(last=False)
+
+    def put(self, key, predictions, mse):
+        entry = {"created": time.time(), "predictions": np.asarray(predictions), "mse": float(mse)}
+        os.makedirs(self._cache_dir(), exist_ok=True)
+        tmp_file = self._cache_file(key) + ".tmp"
+        with open(tmp_file, 'wb') as f:
+            pickle.dump(entry, f)
+        os.replace(tmp_file, self._cache_file(key))
+        self._remember(key, entry)
+        self._evict()
+
+    def _discard(self, key):
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(self._cache_file(key))
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def _evict(self):
+        files = [name for name in os.listdir(self._cache_dir()) if name.endswith(".pkl")]
+        if len(files) <= self.max_entries:
+            return
+        files.sort(key=lambda name: os.path.getmtime(os.path.join(self._cache_dir(), name)))
+        for name in files[:len(files) - self.max_entries]:
+            self._discard(name[:-len(".pkl")])
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+        shutil.rmtree(self._cache_dir(), ignore_errors=True)
+
+PREDICTION_CACHE = PredictionCache()
+
+def predict_symbol(stock_symbol, model_name, window=1, interval="1d"):
+    # With an intraday interval the target is the next bar's close
+    if model_name not in AVAILABLE_MODELS:
+        raise ValueError("Selected model is not supported.")
+    report_progress(f"Loading {stock_symbol.upper()} data")
+    df = load_bars(stock_symbol, interval)
+    stock_symbol = bar_key(stock_symbol, interval)
+    df.name = stock_symbol
+    params = model_params(stock_symbol, model_name)
+    cache_key = PREDICTION_CACHE.key(stock_symbol, model_name, params, df)
+    cached = PREDICTION_CACHE.get(cache_key, window)
+    if cached is not None:
+        predictions, mse = cached
+        return df, get_features(stock_symbol, df), predictions, mse
+
+    report_progress(f"Preparing {model_name} model")
+    model, mse, scaler = train_model(df, model_name, params)
+    report_progress("Predicting")
+    features = get_features(stock_symbol, df)
+    rows = feature_matrix(features.tail(window + _history_rows(model_name, scaler)))
+    predictions = predict_rows(model, scaler, model_name, rows)
+    PREDICTION_CACHE.put(cache_key, predictions, mse)
+    return df, features, predictions, mse
+
+def predict_many(symbols, model_name, window=1, interval="1d"):
+    records = []
+    for stock_symbol in dict.fromkeys(s.strip().lower() for s in symbols if s.strip()):
+        try:
+            _, features, predictions, mse = predict_symbol(stock_symbol, model_name, window, interval)
+            records.append({"symbol": stock_symbol, "model": model_name, "last_date": features.index[-1],
+                            "last_close": float(features['Close'].iloc[-1]), "predicted_close": float(predictions[-1]),
+                            "mse": float(mse), "error": None})
+        except Exception as e:
+            records.append({"symbol": stock_symbol, "model": model_name, "last_date": pd.NaT, "last_close": np.nan,
+                            "predicted_close": np.nan, "mse": np.nan, "error": str(e)})
+    return pd.DataFrame(records)
+
+def write_predictions(results, path):
+    if path.endswith(".parquet"):
+        results.to_parquet(path, index=False)
+    else:
+        results.to_csv(path, index=False)
+
+# Step 2f: Hyperparameter search
+# Successive halving over walk-forward folds. Every candidate is scored on the
+# same expanding-window folds of one feature block. The block is built once and
+# the worker processes read it through a memmap, so no trial rebuilds
+# features. After each rung the best 1/eta of the candidates survive, and they
+# get eta times more resource: a longer slice of the most recent training rows
+# for sklearn models, and more epochs for the LSTM. LSTM trials also stop once
+# their validation loss stalls. The winner is saved for the symbol and used by
+# train_model, compare and backtest.
+SEARCH_SPACES = {
+    "Random Forest": {"n_estimators": [50, 100, 200, 400], "max_depth": [None, 8, 16, 32],
+                      "min_samples_leaf": [1, 3, 10, 30], "max_features": [1.0, 0.5, "sqrt"]},
+    "Online SGD": {"alpha": [1e-6, 1e-5, 1e-4, 1e-3, 1e-2], "epochs": [3, 5, 10, 20]},
+    "LSTM": {"lookback": [10, 20, 30, 60], "units": [[64], [64, 32], [100, 100, 50], [128, 64]],
+             "dropout": [0.0, 0.1, 0.2, 0.3], "learning_rate": [3e-4, 1e-3, 3e-3], "batch_size": [32, 64]},
+}
+MIN_TUNING_ROWS = 100
+
+def _tune_worker(block_path, fold, model_name, params, fraction):
+    block = np.load(block_path, mmap_mode='r')
+    train_start, train_stop, test_stop = fold
+    # Lower rungs only train on the most recent part of the fold's history
+    train_start = max(train_start, train_stop - max(int((train_stop - train_start) * fraction), MIN_TUNING_ROWS))
+    result, _, _ = _backtest_fold(block[:, :-1], block[:, -1], (train_start, train_stop, test_stop), model_name, params)
+    return result["mse"]
+
+def tune(stock_symbol, model_name, n_candidates=27, eta=3, n_folds=3, n_jobs=None, seed=0, save=True, mp_context="spawn"):
+    from sklearn.model_selection import ParameterSampler
+    if model_name not in SEARCH_SPACES:
+        raise ValueError(f"No search space is defined for {model_name}.")
+    base = dict(MODEL_PARAMS.get(model_name, {}))
+    candidates = [dict(base, **candidate) for candidate in ParameterSampler(SEARCH_SPACES[model_name], n_candidates, random_state=seed)]
+    n_rungs = int(np.log(len(candidates)) / np.log(eta) + 1e-9) + 1
+    report_progress(f"Loading {stock_symbol.upper()} data")
+    X, y = _training_arrays(get_features(stock_symbol, scrape_data(stock_symbol)))
+    folds = walk_forward_splits(len(X), n_folds=n_folds)
+
+    trials = []
+    survivors = list(range(len(candidates)))
+    start = time.perf_counter()
+    with tempfile.TemporaryDirectory(ignore_cleanup_errors=True) as tmp_dir:
+        block_path = os.path.join(tmp_dir, "features.npy")
+        np.save(block_path, np.column_stack([X, y]))
+        context = multiprocessing.get_context(mp_context)
+        pool = ProcessPoolExecutor(max_workers=n_jobs, mp_context=context)
+        try:
+            for rung in range(n_rungs):
+                scale = float(eta) ** (rung - n_rungs + 1)
+                resource = max(int(round(base["epochs"] * scale)), 1) if _is_lstm(model_name) else scale
+                rung_params = {index: dict(candidates[index], epochs=resource, patience=3) if _is_lstm(model_name) else candidates[index]
+                               for index in survivors}
+                futures = {pool.submit(_tune_worker, block_path, fold, model_name, rung_params[index],
+                                       1.0 if _is_lstm(model_name) else resource): index
+                           for index in survivors for fold in folds}
+                errors = {index: [] for index in survivors}
+                for done, future in enumerate(as_completed_or_cancelled(futures), start=1):
+                    errors[futures[future]].append(future.result())
+                    report_progress(f"Rung {rung + 1}/{n_rungs}: {len(survivors)} candidates", (rung + done / len(futures)) / n_rungs)
+                for index in survivors:
+                    trials.append({"rung": rung, "candidate": index, "resource": resource,
+                                   "mse": float(np.mean(errors[index])), "params": json.dumps(candidates[index])})
+                survivors = sorted(survivors, key=lambda index: np.mean(errors[index]))[:max(len(survivors) // eta, 1)]
+        except BaseException:
+            # Return on Cancel without waiting for the trials that are already running
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+        pool.shutdown()
+
+    report = pd.DataFrame(trials)
+    best = candidates[survivors[0]]
+    summary = {"symbol": stock_symbol, "model": model_name, "best_params": best,
+               "best_mse": float(report[report["rung"] == n_rungs - 1]["mse"].min()),
+               "default_params": base, "trials": len(report), "wall_seconds": time.perf_counter() - start}
+    if save:
+        tuned_file = _tuned_params_file(stock_symbol)
+        tuned = {}
+        if os.path.exists(tuned_file):
+            with open(tuned_file) as f:
+                tuned = json.load(f)
+        tuned[model_name] = {key: value for key, value in best.items() if key not in base or base[key] != value}
+        os.makedirs(os.path.dirname(tuned_file), exist_ok=True)
+        with open(tuned_file, 'w') as f:
+            json.dump(tuned, f, indent=1)
+    return report, summary
+
+# Step 2g: Multi-horizon forecasting
+# Predicts the next `horizon` closes in one of two ways. "direct" fits one
+# multi-output model whose column h is the close h + 1 bars ahead, so a path
+# is a single predict call. "recursive" reuses the next-bar model and feeds
+# each prediction back in as the newest close. A RolloutState holds the
+# moving-average and RSI windows, EMA values and lags of every symbol as NumPy
+# arrays and writes the next feature row for all of them in place, so nothing
+# is recomputed from the history. Future bars keep the last bar's Open, High
+# and Low relative to its close, and its Volume.
+FORECAST_METHODS = ("recursive", "direct")
+DIRECT_MODELS = {"Linear Regression", "Random Forest"}
+FEATURE_INDEX = {name: j for j, name in enumerate(FEATURE_COLUMNS)}
+
+def _direct_arrays(features, horizon):
+    # Row i is labelled with the closes of the `horizon` bars after it
+    close = features['Close'].values.astype(np.float64)
+    return feature_matrix(features.iloc[:-horizon]), np.ascontiguousarray(sliding_window_view(close[1:], horizon))
+
+def train_direct_model(df, model_name, horizon, params=None):
+    if model_name not in DIRECT_MODELS:
+        raise ValueError(f"{model_name} cannot predict several horizons at once; use the recursive method.")
+    params = model_params(df.name, model_name) if params is None else dict(params)
+    # The horizon is part of the registry key, so direct models sit next to the next-bar model
+    registry_params = dict(params, horizon=horizon)
+    with stage("train_model", rows=len(df)):
+        fingerprint = model_fingerprint(df)
+        cached = MODEL_REGISTRY.get(df.name, model_name, registry_params, fingerprint)
+        if cached is not None:
+            return cached
+        X, Y = _direct_arrays(get_features(df.name, df), horizon)
+        with stage("fit_model", rows=len(X)):
+            model, mse, _ = fit_model(X, Y, model_name, params)
+        MODEL_REGISTRY.put(df.name, model_name, registry_params, fingerprint, model, mse)
+        return model, mse, None
+
+class RolloutState:
+    HISTORY = max(max(MA_WINDOWS), RSI_WINDOW + 1, max(CLOSE_LAGS) + 1)
+
+    def __init__(self, closes, last_bars, horizon):
+        # closes: (symbols x days) close histories, right-aligned and NaN-padded
+        # on the left; last_bars: (symbols x 4) Open, High, Low, Volume of the last bar
+        closes = np.asarray(closes, dtype=np.float64)
+        self.closes = np.empty((len(closes), self.HISTORY + horizon))
+        self.closes[:, :self.HISTORY] = closes[:, -self.HISTORY:]
+        self.count = self.HISTORY
+        fast = _panel_ewm(closes, 12, np.empty_like(closes))
+        slow = _panel_ewm(closes, 26, np.empty_like(closes))
+        self.signal = _panel_ewm(fast - slow, 9, np.empty_like(closes))[:, -1].copy()
+        self.ema_fast = fast[:, -1].copy()
+        self.ema_slow = slow[:, -1].copy()
+        self.bar_shape = np.asarray(last_bars, dtype=np.float64)[:, :3] / closes[:, -1:]
+        self.volume = np.asarray(last_bars, dtype=np.float64)[:, 3].copy()
+
+    def advance(self, close, out):
+        # Append one close per symbol and write the resulting feature rows into out (symbols x FEATURE_COLUMNS)
+        self.closes[:, self.count] = close
+        self.count += 1
+        recent = self.closes[:, self.count - self.HISTORY:self.count]
+        for window in MA_WINDOWS:
+            out[:, FEATURE_INDEX[f'MA{window}']] = recent[:, -window:].mean(axis=1)
+        delta = np.diff(recent[:, -RSI_WINDOW - 1:], axis=1)
+        gain = np.maximum(delta, 0.0).mean(axis=1)
+        loss = np.maximum(-delta, 0.0).mean(axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            out[:, FEATURE_INDEX['RSI']] = 100 - (100 / (1 + gain / loss))
+        self.ema_fast += (2.0 / 13.0) * (close - self.ema_fast)
+        self.ema_slow += (2.0 / 27.0) * (close - self.ema_slow)
+        macd = self.ema_fast - self.ema_slow
+        self.signal += (2.0 / 10.0) * (macd - self.signal)
+        out[:, FEATURE_INDEX['MACD']] = macd
+        out[:, FEATURE_INDEX['Signal']] = self.signal
+        for lag in CLOSE_LAGS:
+            out[:, FEATURE_INDEX[f'Close_lag_{lag}']] = recent[:, -1 - lag]
+        for j, name in enumerate(('Open', 'High', 'Low')):
+            out[:, FEATURE_INDEX[name]] = close * self.bar_shape[:, j]
+        out[:, FEATURE_INDEX['Volume']] = self.volume
+        return out
+
+def recursive_forecast(entries, frames, features, model_name, horizon):
+    # entries: one (model, scaler) per symbol; frames/features: its bars and feature frame
+    needed = [_history_rows(model_name, scaler) + 1 for _, scaler in entries]
+    n_history = max(needed)
+    n_days = max(len(df) for df in frames)
+    closes = np.full((len(frames), n_days), np.nan)
+    for i, df in enumerate(frames):
+        closes[i, n_days - len(df):] = df['Close'].values
+    history = [feature_matrix(frame.tail(n_history)) for frame in features]
+    bar_columns = [FEATURE_INDEX[name] for name in ('Open', 'High', 'Low', 'Volume')]
+    state = RolloutState(closes, np.stack([block[-1, bar_columns] for block in history]), horizon)
+    # Plain linear models are stacked into one coefficient matrix, so each step
+    # is a single product across all symbols instead of one predict call each
+    linear = all(scaler is None and hasattr(model, "coef_") and np.ndim(model.coef_) == 1 for model, scaler in entries)
+    if linear:
+        coef = np.stack([model.coef_ for model, _ in entries])
+        intercept = np.array([model.intercept_ for model, _ in entries])
+    rows = np.full((len(frames), n_history + horizon, history[0].shape[1]), np.nan, dtype=history[0].dtype)
+    for i, block in enumerate(history):
+        rows[i, n_history - len(block):n_history] = block
+    # Cross-asset columns depend on the rest of the universe, so they keep their last value
+    rows[:, n_history:, len(FEATURE_COLUMNS):] = rows[:, n_history - 1:n_history, len(FEATURE_COLUMNS):]
+    paths = np.empty((len(frames), horizon))
+    for step in range(horizon):
+        stop = n_history + step
+        if linear:
+            with stage("predict", rows=len(entries)):
+                paths[:, step] = np.einsum('ij,ij->i', rows[:, stop - 1], coef) + intercept
+        else:
+            for i, (model, scaler) in enumerate(entries):
+                paths[i, step] = predict_rows(model, scaler, model_name, rows[i, stop - needed[i]:stop])[-1]
+        if step + 1 < horizon:
+            state.advance(paths[:, step], rows[:, stop])
+    return paths
+
+def forecast_many(symbols, model_name, horizon=5, method="recursive", interval="1d"):
+    # One row per symbol with its path in columns t+1 .. t+horizon
+    if model_name not in AVAILABLE_MODELS:
+        raise ValueError("Selected model is not supported.")
+    if method not in FORECAST_METHODS:
+        raise ValueError(f"Unknown forecast method {method!r}; expected one of {', '.join(FORECAST_METHODS)}.")
+    loaded, paths, errors = {}, {}, {}
+    for stock_symbol in dict.fromkeys(s.strip().lower() for s in symbols if s.strip()):
+        try:
+            report_progress(f"Loading {stock_symbol.upper()} data")
+            df = load_bars(stock_symbol, interval)
+            df.name = bar_key(stock_symbol, interval)
+            params = model_params(df.name, model_name)
+            cache_key = PREDICTION_CACHE.key(df.name, model_name, dict(params, horizon=horizon, forecast=method), df)
+            cached = PREDICTION_CACHE.get(cache_key, horizon)
+            if cached is not None:
+                paths[stock_symbol] = (df, *cached)
+                continue
+            report_progress(f"Preparing {model_name} model for {stock_symbol.upper()}")
+            if method == "direct":
+                model, mse, _ = train_direct_model(df, model_name, horizon, params)
+                with stage("predict", rows=1):
+                    path = np.asarray(model.predict(feature_matrix(get_features(df.name, df).tail(1))), dtype=np.float64).ravel()
+                PREDICTION_CACHE.put(cache_key, path, mse)
+                paths[stock_symbol] = (df, path, mse)
+            else:
+                model, mse, scaler = train_model(df, model_name, params)
+                loaded[stock_symbol] = (df, cache_key, model, mse, scaler)
+        except Exception as e:
+            errors[stock_symbol] = str(e)
+
+    if loaded:
+        report_progress(f"Rolling {len(loaded)} symbols forward {horizon} bars")
+        batch = list(loaded.values())
+        rolled = recursive_forecast([(model, scaler) for _, _, model, _, scaler in batch], [df for df, *_ in batch],
+                                    [get_features(df.name, df) for df, *_ in batch], model_name, horizon)
+        for stock_symbol, (df, cache_key, _, mse, _), path in zip(loaded, batch, rolled):
+            PREDICTION_CACHE.put(cache_key, path, mse)
+            paths[stock_symbol] = (df, path, mse)
+
+    records = []
+    for stock_symbol in dict.fromkeys(s.strip().lower() for s in symbols if s.strip()):
+        record = {"symbol": stock_symbol, "model": model_name, "method": method}
+        if stock_symbol in paths:
+            df, path, mse = paths[stock_symbol]
+            record.update({"last_date": df.index[-1], "last_close": float(df['Close'].iloc[-1]), "mse": float(mse), "error": None})
+            record.update({f"t+{h}": float(value) for h, value in enumerate(path, start=1)})
+        else:
+            record.update({"last_date": pd.NaT, "last_close": np.nan, "mse": np.nan, "error": errors[stock_symbol]})
+        records.append(record)
+    return pd.DataFrame(records)
+
+def benchmark_forecast(n_symbols=200, horizon=20, n_pandas=10, n_days=1260):
+    # Vectorized rollout against re-running add_technical_indicators after every predicted bar
+    from sklearn.linear_model import LinearRegression
+    source = FixtureSource()
+    frames, features, entries = [], [], []
+    for i in range(n_symbols):
+        df = source.fetch(f"fc{i:04d}").tail(n_days)
+        frame = add_technical_indicators(df.copy())
+        X, y = _training_arrays(frame)
+        frames.append(df)
+        features.append(frame)
+        entries.append((LinearRegression().fit(X, y), None))
+
+    start = time.perf_counter()
+    paths = recursive_forecast(entries, frames, features, "Linear Regression", horizon)
+    rollout_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    expected = np.empty((n_pandas, horizon))
+    for i in range(n_pandas):
+        df, (model, _) = frames[i].copy(), entries[i]
+        last = df.iloc[-1]
+        for step in range(horizon):
+            frame = add_technical_indicators(df.copy())
+            close = expected[i, step] = model.predict(feature_matrix(frame.tail(1)))[0]
+            bar = {name: last[name] / last['Close'] * close for name in ('Open', 'High', 'Low')}
+            df.loc[df.index[-1] + pd.offsets.BDay()] = dict(bar, Close=close, Volume=last['Volume'])
+    pandas_elapsed = (time.perf_counter() - start) * n_symbols / n_pandas
+
+    error = np.max(np.abs(paths[:n_pandas] - expected))
+    print(f"{n_symbols} symbols x {horizon} bars: vectorized rollout {rollout_elapsed:.2f}s, "
+          f"recomputing indicators per bar ~{pandas_elapsed:.2f}s ({pandas_elapsed / rollout_elapsed:.1f}x), max difference {error:.1e}")
+    return rollout_elapsed, pandas_elapsed
+
 # Step 3: Plotting and GUI Interaction
+# One chart is embedded in the main window and reused for every prediction.
+# Its lines are animated artists: a redraw with unchanged axes restores the
+# cached background and blits the lines, and only a change of axis limits
+# (usually a new symbol) pays for a full draw. The price history is reduced
+# with LTTB to at most max_points before drawing.
+def lttb(x, y, n_out):
+    # Largest-Triangle-Three-Buckets: keeps the first and last points and, from
+    # each bucket in between, the point that forms the largest triangle with the
+    # previously kept point and the mean of the next bucket
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return x, y
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    counts = np.diff(edges)
+    mean_x = np.add.reduceat(x[:n - 1], edges[:-1]) / counts
+    mean_y = np.add.reduceat(y[:n - 1], edges[:-1]) / counts
+    next_x = np.append(mean_x[1:], x[-1])
+    next_y = np.append(mean_y[1:], y[-1])
+    keep = np.empty(n_out, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for bucket in range(n_out - 2):
+        lo, hi = edges[bucket], edges[bucket + 1]
+        area = np.abs((x[a] - next_x[bucket]) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (next_y[bucket] - y[a]))
+        a = lo + int(np.argmax(area))
+        keep[bucket + 1] = a
+    return x[keep], y[keep]
+
+class PredictionChart:
+    def __init__(self, master=None, max_points=500):
+        from matplotlib.figure import Figure
+        self.max_points = max_points
+        self.figure = Figure(figsize=(8, 4), dpi=100)
+        self.axes = self.figure.add_subplot(111)
+        if master is None:
+            # Headless canvas, used by the chart benchmark
+            from matplotlib.backends.backend_agg import FigureCanvasAgg
+            self.canvas = FigureCanvasAgg(self.figure)
+        else:
+            from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
+            self.canvas = FigureCanvasTkAgg(self.figure, master=master)
+            NavigationToolbar2Tk(self.canvas, master)
+            self.canvas.get_tk_widget().pack(fill='both', expand=True)
+        self.history_line, = self.axes.plot([], [], color='lightgray', label='History', animated=True)
+        self.actual_line, = self.axes.plot([], [], color='blue', label='Actual Prices', animated=True)
+        self.predicted_line, = self.axes.plot([], [], color='orange', label='Predicted Prices', animated=True)
+        self.title = self.axes.set_title("")
+        self.title.set_animated(True)
+        self.axes.xaxis_date()
+        self.axes.set_xlabel('Date')
+        self.axes.set_ylabel('Price')
+        self.axes.legend(loc='upper left')
+        self.background = None
+        self.canvas.mpl_connect('draw_event', self._on_draw)
+
+    def _on_draw(self, event):
+        # Everything but the animated artists; blits start from this
+        self.background = self.canvas.copy_from_bbox(self.figure.bbox)
+        self._draw_artists()
+
+    def _draw_artists(self):
+        for artist in (self.history_line, self.actual_line, self.predicted_line, self.title):
+            self.axes.draw_artist(artist)
+
+    def _limits(self, x, values):
+        low, high = min(v.min() for v in values), max(v.max() for v in values)
+        margin = (high - low) * 0.05 or 1.0
+        return (x[0], x[-1]), (low - margin, high + margin)
+
+    def update(self, df, predictions, stock_symbol, model_name):
+        import matplotlib.dates as mdates
+        x = mdates.date2num(df.index.values)
+        close = np.asarray(df['Close'].values, dtype=np.float64)
+        window = len(predictions)
+        self.history_line.set_data(*lttb(x, close, self.max_points))
+        self.actual_line.set_data(x[-window:], close[-window:])
+        self.predicted_line.set_data(x[-window:], predictions)
+        self.title.set_text(f'{model_name} Prediction vs Actual Prices for {stock_symbol.upper()}')
+
+        xlim, ylim = self._limits(x, [close, np.asarray(predictions)])
+        current_y = self.axes.get_ylim()
+        # Keep the current axes if the data still fits and fills most of them
+        fits = (tuple(self.axes.get_xlim()) == xlim and current_y[0] <= ylim[0] and ylim[1] <= current_y[1]
+                and (ylim[1] - ylim[0]) >= 0.8 * (current_y[1] - current_y[0]))
+        if self.background is None or not fits:
+            self.axes.set_xlim(*xlim)
+            self.axes.set_ylim(*ylim)
+            self.canvas.draw()
+            return "draw"
+        self.canvas.restore_region(self.background)
+        self._draw_artists()
+        self.canvas.blit(self.figure.bbox)
+        return "blit"
+
 def plot_data(df, predictions, stock_symbol, model_name):
-    plt.figure(figsize=(10, 5))
-    plt.plot(df.index[-len(predictions):], predictions, label='Predicted Prices', color='orange')
-    plt.plot(df.index[-len(predictions):], df['Close'].tail(len(predictions)), label='Actual Prices', color='blue')
-    plt.xlabel('Date')
-    plt.ylabel('Price')
-    plt.legend()
-    plt.title(f'{model_name} Prediction vs Actual Prices for {stock_symbol.upper()}')
-    plt.show()
+    global prediction_chart
+    with stage("plot_data", rows=len(df)):
+        # Created on first use so startup does not import matplotlib
+        if prediction_chart is None:
+            prediction_chart = PredictionChart(chart_frame)
+        prediction_chart.update(df, predictions, stock_symbol, model_name)
+
+def benchmark_chart(n_symbols=5, n_days=1260, repeats=3):
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    source = FixtureSource()
+    frames = [source.fetch(f"chart{i}").tail(n_days) for i in range(n_symbols)]
+    predictions = [frame['Close'].values[-30:] * 1.01 for frame in frames]
+
+    # Previous behaviour: a new figure per click, full history drawn undecimated
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for i, (frame, predicted) in enumerate(zip(frames, predictions)):
+            figure = Figure(figsize=(8, 4), dpi=100)
+            canvas = FigureCanvasAgg(figure)
+            axes = figure.add_subplot(111)
+            axes.plot(frame.index, frame['Close'].values, color='lightgray')
+            axes.plot(frame.index[-30:], frame['Close'].values[-30:], color='blue')
+            axes.plot(frame.index[-30:], predicted, color='orange')
+            axes.set_xlabel('Date')
+            axes.set_ylabel('Price')
+            axes.legend(['History', 'Actual Prices', 'Predicted Prices'])
+            axes.set_title(f'Random Forest Prediction vs Actual Prices for CHART{i}')
+            canvas.draw()
+    new_figure = (time.perf_counter() - start) / (repeats * n_symbols)
+
+    chart = PredictionChart()
+    chart.update(frames[0], predictions[0], "chart0", "Random Forest")
+    timings = {"draw": [], "blit": []}
+    for _ in range(repeats):
+        for i, (frame, predicted) in enumerate(zip(frames, predictions)):
+            for model_name in ("Random Forest", "LSTM"):
+                start = time.perf_counter()
+                mode = chart.update(frame, predicted, f"chart{i}", model_name)
+                timings[mode].append(time.perf_counter() - start)
+    print(f"{n_symbols} symbols x {n_days} days: new figure per click {new_figure * 1000:.1f}ms, "
+          f"reused chart switching symbol {np.mean(timings['draw']) * 1000:.1f}ms, "
+          f"same symbol (blit) {np.mean(timings['blit']) * 1000:.1f}ms")
+    return new_figure, timings
+
+# Step 3a: Background jobs
+# Long pipelines (downloads, training) run on a worker thread so the Tk
+# mainloop keeps drawing. Workers never touch widgets: progress, results and
+# errors go through a queue that the mainloop drains with after(). Pipeline
+# code reports progress via report_progress(), which finds the running job
+# through a thread-local, and cancellation is checked at stage boundaries
+# and after every LSTM epoch.
+class JobCancelled(Exception):
+    pass
+
+_job_context = threading.local()
+
+class Job:
+    def __init__(self, name, events):
+        self.name = name
+        self.events = events
+        self.cancel_event = threading.Event()
+        self.trace = None
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def check_cancelled(self):
+        if self.cancel_event.is_set():
+            raise JobCancelled(f"{self.name} was cancelled.")
+
+    def progress(self, stage, fraction=None):
+        self.check_cancelled()
+        self.events.put(("progress", self, (stage, fraction)))
+
+def current_job():
+    return getattr(_job_context, "job", None)
+
+def report_progress(stage, fraction=None):
+    job = current_job()
+    if job is not None:
+        job.progress(stage, fraction)
+
+def as_completed_or_cancelled(futures, poll_seconds=0.2):
+    # Like as_completed, but wakes up to notice Cancel while every task is still running
+    job = current_job()
+    pending = set(futures)
+    while pending:
+        done, pending = wait(pending, timeout=poll_seconds, return_when=FIRST_COMPLETED)
+        if job is not None:
+            job.check_cancelled()
+        yield from done
+
+def _keras_progress_callback(job, epochs):
+    # Built on demand so TensorFlow is only imported when an LSTM is trained
+    class EpochProgress(tf.keras.callbacks.Callback):
+        def on_epoch_end(self, epoch, logs=None):
+            if job.cancel_event.is_set():
+                self.model.stop_training = True
+            else:
+                job.progress(f"Training LSTM: epoch {epoch + 1}/{epochs}", (epoch + 1) / epochs)
+    return EpochProgress()
+
+class JobExecutor:
+    # Every job is recorded as a Trace; its on_done callback (plotting) is added
+    # to the same trace before on_trace is told the job has finished
+    def __init__(self, root, on_progress=None, max_workers=1, poll_ms=100, on_trace=None):
+        self.root = root
+        self.on_progress = on_progress
+        self.on_trace = on_trace
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self.events = queue.Queue()
+        self.callbacks = {}
+        self.active = []
+        self.poll_ms = poll_ms
+        self.root.after(self.poll_ms, self._poll)
+
+    def submit(self, name, fn, on_done, on_error=None):
+        job = Job(name, self.events)
+        self.callbacks[job] = (on_done, on_error)
+        self.active.append(job)
+        self.pool.submit(self._run, job, fn)
+        return job
+
+    def _run(self, job, fn):
+        _job_context.job = job
+        try:
+            with recording(job.name) as job.trace:
+                result = fn()
+            job.check_cancelled()
+            self.events.put(("done", job, result))
+        except Exception as e:
+            self.events.put(("error", job, e))
+        finally:
+            _job_context.job = None
+
+    def cancel_all(self):
+        for job in self.active:
+            job.cancel()
+
+    def _call(self, callback, *args):
+        # A failing callback is reported but must not stop the poll loop that delivers later jobs
+        try:
+            callback(*args)
+        except Exception as e:
+            messagebox.showerror("Error", str(e))
+
+    def _deliver(self, on_done, job, payload):
+        with recording(trace=job.trace):
+            on_done(payload)
+
+    def _poll(self):
+        try:
+            while True:
+                kind, job, payload = self.events.get_nowait()
+                if kind == "progress":
+                    if self.on_progress is not None:
+                        self._call(self.on_progress, job, *payload)
+                    continue
+                self.active.remove(job)
+                on_done, on_error = self.callbacks.pop(job)
+                if self.on_progress is not None:
+                    self._call(self.on_progress, job, "Cancelled" if isinstance(payload, JobCancelled) else "Ready", None)
+                if kind == "done":
+                    self._call(self._deliver, on_done, job, payload)
+                elif isinstance(payload, JobCancelled):
+                    pass
+                elif on_error is not None:
+                    self._call(on_error, payload)
+                else:
+                    messagebox.showerror("Error", str(payload))
+                if self.on_trace is not None and job.trace is not None:
+                    self._call(self.on_trace, job)
+        except queue.Empty:
+            pass
+        finally:
+            self.root.after(self.poll_ms, self._poll)
+
+    def shutdown(self):
+        self.cancel_all()
+        self.pool.shutdown(wait=False, cancel_futures=True)
 
 # Define show_historical_data function
 def show_historical_data():
@@ -165,117 +2736,177 @@ def show_historical_data():
 
 # Additional Features
 
+def _selected_symbol_and_model():
+    stock_symbol = stock_symbol_var.get().strip().lower()
+    if not stock_symbol:
+        raise ValueError("Please enter a valid stock symbol.")
+    
+    model_name = model_var.get()
+    if model_name not in AVAILABLE_MODELS:
+        raise ValueError("Selected model is not supported.")
+    return stock_symbol, model_name
+
 def predict_stock_price():
     try:
-        stock_symbol = stock_symbol_var.get().strip().lower()
-        if not stock_symbol:
-            raise ValueError("Please enter a valid stock symbol.")
-        
-        model_name = model_var.get()
-        if model_name not in AVAILABLE_MODELS:
-            raise ValueError("Selected model is not supported.")
-        
-        df = scrape_data(stock_symbol)
-        df.name = stock_symbol
-        model, mse, scaler = train_model(df, model_name)
-        
-        latest_features = df[['Open', 'High', 'Low', 'Volume', 'MA5', 'MA10', 'MA20', 'RSI', 'MACD', 'Signal'] + [f'Close_lag_{lag}' for lag in range(1,6)]].tail(1)
-        
-        # Reshape data for LSTM model prediction
-        if model_name == "LSTM":
-            latest_features = scaler.transform(latest_features)
-            latest_features = latest_features.reshape((latest_features.shape[0], latest_features.shape[1], 1))
-        
-        predicted_price = model.predict(latest_features)[0]
-        
-        # Convert the predicted price to a scalar
-        if isinstance(predicted_price, np.ndarray):
-            predicted_price = predicted_price.item()
+        stock_symbol, model_name = _selected_symbol_and_model()
+    except Exception as e:
+        messagebox.showerror("Error", str(e))
+        return
 
-        # If LSTM, inverse scale the prediction
-        if model_name == "LSTM":
-            predicted_price = scaler.inverse_transform([[predicted_price]])[0][0]
+    def show_prediction(result):
+        # One predict call covers both the plot window and the latest row
+        df, features, plot_predictions, mse = result
+        predicted_price = plot_predictions[-1]
 
         result_message = f"Predicted Next Day Close Price: ${predicted_price:.2f}"
         if mse is not None:
             result_message += f"\nModel Mean Squared Error (MSE): {mse:.4f}"
-        
-        messagebox.showinfo("Stock Price Prediction", result_message)
-        
-        plot_features = df[['Open', 'High', 'Low', 'Volume', 'MA5', 'MA10', 'MA20', 'RSI', 'MACD', 'Signal'] + [f'Close_lag_{lag}' for lag in range(1,6)]].tail(30)
-        
-        # Reshape data for LSTM model prediction
-        if model_name == "LSTM":
-            plot_features = scaler.transform(plot_features)
-            plot_features = plot_features.reshape((plot_features.shape[0], plot_features.shape[1], 1))
-        
-        plot_predictions = model.predict(plot_features)
-        
-        if model_name == "LSTM":
-            plot_predictions = scaler.inverse_transform(plot_predictions).flatten()
 
         plot_data(df, plot_predictions, stock_symbol, model_name)
-    except Exception as e:
-        messagebox.showerror("Error", str(e))
+        messagebox.showinfo("Stock Price Prediction", result_message)
+
+    job_executor.submit("Predict", lambda: predict_symbol(stock_symbol, model_name, window=30), show_prediction)
 
 def save_prediction_to_file():
     try:
-        stock_symbol = stock_symbol_var.get().strip().lower()
-        if not stock_symbol:
-            raise ValueError("Please enter a valid stock symbol.")
-        
-        model_name = model_var.get()
-        if model_name not in AVAILABLE_MODELS:
-            raise ValueError("Selected model is not supported.")
-        
-        df = scrape_data(stock_symbol)
-        df.name = stock_symbol
-        model, mse, scaler = train_model(df, model_name)
-        
-        latest_features = df[['Open', 'High', 'Low', 'Volume', 'MA5', 'MA10', 'MA20', 'RSI', 'MACD', 'Signal'] + [f'Close_lag_{lag}' for lag in range(1,6)]].tail(1)
-        
-        # Reshape data for LSTM model prediction
-        if model_name == "LSTM":
-            latest_features = scaler.transform(latest_features)
-            latest_features = latest_features.reshape((latest_features.shape[0], latest_features.shape[1], 1))
-        
-        predicted_price = model.predict(latest_features)[0]
-        
-        # Convert the predicted price to a scalar
-        if isinstance(predicted_price, np.ndarray):
-            predicted_price = predicted_price.item()
-        
-        # If LSTM, inverse scale the prediction
-        if model_name == "LSTM":
-            predicted_price = scaler.inverse_transform([[predicted_price]])[0][0]
+        stock_symbol, model_name = _selected_symbol_and_model()
+    except Exception as e:
+        messagebox.showerror("Error", str(e))
+        return
+
+    def save_prediction(result):
+        df, features, predictions, mse = result
+        predicted_price = predictions[-1]
 
         save_path = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV files", "*.csv"), ("All files", "*.*")])
         if save_path:
-            df.tail(30).to_csv(save_path)
-            with open(save_path, 'a') as f:
-                f.write(f"\nPredicted Next Day Close Price: ${predicted_price:.2f}\nModel Mean Squared Error (MSE): {mse:.4f}")
+            try:
+                features.tail(30).to_csv(save_path)
+                with open(save_path, 'a') as f:
+                    f.write(f"\nPredicted Next Day Close Price: ${predicted_price:.2f}\nModel Mean Squared Error (MSE): {mse:.4f}")
+            except OSError as e:
+                messagebox.showerror("Error", f"Could not save the prediction: {e}")
+                return
             messagebox.showinfo("Save Prediction", "Prediction and data saved successfully!")
-    except Exception as e:
-        messagebox.showerror("Error", str(e))
+
+    job_executor.submit("Save Prediction", lambda: predict_symbol(stock_symbol, model_name), save_prediction)
 
 def compare_models():
-    try:
-        stock_symbol = stock_symbol_var.get().strip().lower()
-        if not stock_symbol:
-            raise ValueError("Please enter a valid stock symbol.")
-        
-        df = scrape_data(stock_symbol)
-        df.name = stock_symbol
-        
-        results = {}
-        for model_name in AVAILABLE_MODELS.keys():
-            model, mse, _ = train_model(df, model_name)
-            results[model_name] = mse
-        
+    stock_symbol = stock_symbol_var.get().strip().lower()
+    if not stock_symbol:
+        messagebox.showerror("Error", "Please enter a valid stock symbol.")
+        return
+
+    def show_comparison(results):
         result_message = "\n".join([f"{model}: MSE = {mse:.4f}" for model, mse in results.items()])
         messagebox.showinfo("Model Comparison", result_message)
-    except Exception as e:
-        messagebox.showerror("Error", str(e))
+
+    job_executor.submit("Compare Models", lambda: compare_models_parallel([stock_symbol]).loc[stock_symbol], show_comparison)
+
+# Step 3b: Virtualized data viewer
+# Only the rows that are on screen exist as Treeview items; scrolling
+# rewrites those few items from the underlying NumPy arrays (for cached
+# symbols, the memory-mapped store). Sorting reorders an index array instead
+# of the data, and date-range slicing narrows the visible row range without
+# copying, so a million-row history opens instantly.
+class VirtualTable(tk.Frame):
+    def __init__(self, parent, df, visible_rows=30):
+        super().__init__(parent)
+        self.dates = df.index
+        self.date_format = "%Y-%m-%d" if (df.index == df.index.normalize()).all() else "%Y-%m-%d %H:%M"
+        self.columns = list(df.columns)
+        self.values = df.to_numpy()
+        self.visible_rows = visible_rows
+        self.order = None
+        self.sort_column = None
+        self.sort_descending = False
+        self.lo, self.hi = 0, len(df)
+        self.top = 0
+
+        self.tree = ttk.Treeview(self, columns=["Date"] + self.columns, show="headings", height=visible_rows)
+        for column in ["Date"] + self.columns:
+            self.tree.heading(column, text=column, command=lambda c=column: self.sort_by(c))
+            self.tree.column(column, width=140 if column == "Date" else 110, anchor='e')
+        self.items = [self.tree.insert("", tk.END, values=()) for _ in range(visible_rows)]
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self._on_scrollbar)
+        self.status = tk.Label(self, anchor='w')
+
+        self.status.pack(side=tk.BOTTOM, fill=tk.X)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.pack(side=tk.LEFT, expand=True, fill=tk.BOTH)
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.tree.bind(sequence, self._on_wheel)
+        self.render()
+
+    def row_count(self):
+        return self.hi - self.lo
+
+    def _row_positions(self, start, stop):
+        # Positions in the underlying arrays for the visible slice, honoring the current sort
+        if self.order is None:
+            return np.arange(self.lo + start, self.lo + stop)
+        return self.order[start:stop]
+
+    def render(self):
+        total = self.row_count()
+        self.top = max(0, min(self.top, total - self.visible_rows))
+        stop = min(self.top + self.visible_rows, total)
+        positions = self._row_positions(self.top, stop)
+        rows = self.values[positions]
+        for item, position, row in zip(self.items, positions, rows):
+            self.tree.item(item, values=[self.dates[position].strftime(self.date_format)] +
+                                        [f"{value:,.0f}" if column == 'Volume' else f"{value:.4f}" for column, value in zip(self.columns, row)])
+        for item in self.items[len(positions):]:
+            self.tree.item(item, values=())
+        if total:
+            self.scrollbar.set(self.top / total, stop / total)
+            self.status.configure(text=f"Rows {self.top + 1}-{stop} of {total:,}")
+        else:
+            self.scrollbar.set(0, 1)
+            self.status.configure(text="No rows")
+
+    def _on_scrollbar(self, action, amount, unit=None):
+        if action == "moveto":
+            self.top = int(float(amount) * self.row_count())
+        elif action == "scroll":
+            step = self.visible_rows if unit == "pages" else 1
+            self.top += int(amount) * step
+        self.render()
+
+    def _on_wheel(self, event):
+        if getattr(event, "num", None) == 4 or getattr(event, "delta", 0) > 0:
+            self.top -= 3
+        else:
+            self.top += 3
+        self.render()
+        return "break"
+
+    def sort_by(self, column):
+        self.sort_descending = not self.sort_descending if column == self.sort_column else False
+        self.sort_column = column
+        keys = self.dates.values[self.lo:self.hi] if column == "Date" else self.values[self.lo:self.hi, self.columns.index(column)]
+        order = np.argsort(keys, kind='stable') + self.lo
+        self.order = order[::-1] if self.sort_descending else order
+        self.top = 0
+        self.render()
+
+    def show_range(self, start=None, end=None):
+        # Binary search on the (sorted) dates; the data itself is not copied
+        self.lo = 0 if start is None else int(self.dates.searchsorted(pd.Timestamp(start), side='left'))
+        self.hi = len(self.dates) if end is None else int(self.dates.searchsorted(pd.Timestamp(end), side='right'))
+        self.order = None
+        self.sort_column = None
+        self.top = 0
+        self.render()
+
+def show_table_window(title, df, start=None, end=None):
+    data_window = tk.Toplevel(root)
+    data_window.title(title)
+    table = VirtualTable(data_window, df)
+    table.pack(expand=True, fill=tk.BOTH)
+    if start is not None or end is not None:
+        table.show_range(start, end)
+    return table
 
 def view_full_data():
     try:
@@ -284,24 +2915,7 @@ def view_full_data():
             raise ValueError("Please enter a valid stock symbol.")
         
         df = scrape_data(stock_symbol)
-        
-        # Create a new window to display the data
-        data_window = tk.Toplevel(root)
-        data_window.title(f"Full Historical Data for {stock_symbol.upper()}")
-        
-        # Create a text widget to display the data
-        text = tk.Text(data_window, wrap="none")
-        text.insert(tk.END, df.to_string())
-        text.pack(expand=True, fill=tk.BOTH)
-        
-        # Add scrollbars
-        x_scroll = tk.Scrollbar(data_window, orient=tk.HORIZONTAL, command=text.xview)
-        x_scroll.pack(side=tk.BOTTOM, fill=tk.X)
-        text['xscrollcommand'] = x_scroll.set
-        
-        y_scroll = tk.Scrollbar(data_window, orient=tk.VERTICAL, command=text.yview)
-        y_scroll.pack(side=tk.RIGHT, fill=tk.Y)
-        text['yscrollcommand'] = y_scroll.set
+        show_table_window(f"Full Historical Data for {stock_symbol.upper()}", df)
     except Exception as e:
         messagebox.showerror("Error", str(e))
 
@@ -316,30 +2930,11 @@ def customize_date_range():
         end_date = simpledialog.askstring("Input", "Enter end date (YYYY-MM-DD):")
         
         if start_date and end_date:
-            df = yf.download(stock_symbol, start=start_date, end=end_date)
+            df = load_range(stock_symbol, start_date, end_date)
             if df.empty:
                 raise ValueError("No data found for this date range.")
             
-            df.reset_index(inplace=True)
-            df.set_index("Date", inplace=True)
-            
-            # Display the fetched data
-            data_window = tk.Toplevel(root)
-            data_window.title(f"Data for {stock_symbol.upper()} from {start_date} to {end_date}")
-            
-            # Create a text widget to display the data
-            text = tk.Text(data_window, wrap="none")
-            text.insert(tk.END, df.to_string())
-            text.pack(expand=True, fill=tk.BOTH)
-            
-            # Add scrollbars
-            x_scroll = tk.Scrollbar(data_window, orient=tk.HORIZONTAL, command=text.xview)
-            x_scroll.pack(side=tk.BOTTOM, fill=tk.X)
-            text['xscrollcommand'] = x_scroll.set
-            
-            y_scroll = tk.Scrollbar(data_window, orient=tk.VERTICAL, command=text.yview)
-            y_scroll.pack(side=tk.RIGHT, fill=tk.Y)
-            text['yscrollcommand'] = y_scroll.set
+            show_table_window(f"Data for {stock_symbol.upper()} from {start_date} to {end_date}", df)
     except Exception as e:
         messagebox.showerror("Error", str(e))
 
@@ -350,7 +2945,7 @@ def reset_application():
 
 # GUI Setup
 def setup_gui():
-    global stock_symbol_var, model_var, root
+    global stock_symbol_var, model_var, root, job_executor, chart_frame, prediction_chart
     
     # Create the main application window (root)
     root = tk.Tk()
@@ -361,7 +2956,12 @@ def setup_gui():
     model_var = tk.StringVar(value="Random Forest")
 
     frame = tk.Frame(root, padx=20, pady=20)
-    frame.pack(padx=10, pady=10)
+    frame.pack(side='left', fill='y', padx=10, pady=10)
+
+    # Prediction chart, built on the first prediction
+    chart_frame = tk.Frame(root)
+    chart_frame.pack(side='right', fill='both', expand=True)
+    prediction_chart = None
 
     # Stock Symbol Selection
     label_stock = tk.Label(frame, text="Enter Stock Symbol (e.g., AAPL):")
@@ -374,7 +2974,7 @@ def setup_gui():
     label_model = tk.Label(frame, text="Select Prediction Model:")
     label_model.pack(anchor='w')
 
-    model_dropdown = ttk.Combobox(frame, textvariable=model_var, values=["Linear Regression", "Random Forest", "LSTM"], state="readonly", width=28)
+    model_dropdown = ttk.Combobox(frame, textvariable=model_var, values=list(AVAILABLE_MODELS), state="readonly", width=28)
     model_dropdown.pack(pady=(0, 10))
 
     # Predict Button
@@ -405,9 +3005,330 @@ def setup_gui():
     button_reset = tk.Button(frame, text="Reset", command=reset_application, width=20, bg='red', fg='white')
     button_reset.pack(pady=(0, 5))
 
+    # Background job status: stage text, progress bar and cancel
+    status_var = tk.StringVar(value="Ready")
+    status_label = tk.Label(frame, textvariable=status_var, anchor='w', width=30)
+    status_label.pack(pady=(10, 0), anchor='w')
+
+    progress_bar = ttk.Progressbar(frame, mode="determinate", maximum=1.0, length=200)
+    progress_bar.pack(pady=(0, 5))
+
+    def show_progress(job, stage, fraction):
+        status_var.set(f"{job.name}: {stage}" if stage not in ("Ready", "Cancelled") else stage)
+        if fraction is None and stage in ("Ready", "Cancelled"):
+            progress_bar.stop()
+            progress_bar.configure(mode="determinate", value=0)
+        elif fraction is None:
+            if str(progress_bar['mode']) != "indeterminate":
+                progress_bar.configure(mode="indeterminate")
+                progress_bar.start(15)
+        else:
+            progress_bar.stop()
+            progress_bar.configure(mode="determinate", value=fraction)
+
+    # Slowest stages of the last finished job
+    timings_var = tk.StringVar(value="")
+    timings_label = tk.Label(frame, textvariable=timings_var, anchor='w', justify='left', font=("TkDefaultFont", 8))
+    timings_label.pack(pady=(0, 5), anchor='w')
+    last_trace = {}
+
+    def show_timings(job):
+        last_trace["trace"] = job.trace
+        timings_var.set(f"{job.name} slowest stages:\n" + format_timings(job.trace, top=3))
+
+    def export_trace():
+        if "trace" not in last_trace:
+            messagebox.showinfo("Export Trace", "Run a job first.")
+            return
+        save_path = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("Chrome trace", "*.trace.json"), ("JSON", "*.json")])
+        if save_path:
+            last_trace["trace"].export(save_path, "chrome" if save_path.endswith(".trace.json") else "json")
+
+    job_executor = JobExecutor(root, on_progress=show_progress, on_trace=show_timings)
+
+    button_cancel = tk.Button(frame, text="Cancel", command=job_executor.cancel_all, width=20)
+    button_cancel.pack(pady=(0, 5))
+
+    button_trace = tk.Button(frame, text="Export Trace", command=export_trace, width=20)
+    button_trace.pack(pady=(0, 5))
+
     # Start the Tkinter main loop
     root.mainloop()
+    job_executor.shutdown()
+
+# Startup benchmark: each probe runs in a fresh interpreter so it measures a
+# true cold start (module import plus whatever backend the action touches)
+_STARTUP_PROBES = {
+    "import only": "",
+    "linear regression": "m['AVAILABLE_MODELS']['Linear Regression']().fit([[0.0], [1.0]], [0.0, 1.0])",
+    "lstm": "m['create_lstm_model']((30, 15))",
+}
+
+def benchmark_startup(repeats=3):
+    script = os.path.abspath(__file__)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for label, action in _STARTUP_PROBES.items():
+            code = f"import runpy; m = runpy.run_path({script!r}, run_name='startup_probe'); {action}"
+            timings = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                subprocess.run([sys.executable, "-c", code], cwd=tmp_dir, check=True, capture_output=True)
+                timings.append(time.perf_counter() - start)
+            print(f"{label:>18}: best {min(timings):.2f}s, median {sorted(timings)[len(timings) // 2]:.2f}s")
+
+# Command line entry point: no arguments opens the GUI
+def _read_symbols(args):
+    symbols = list(args.symbols)
+    if args.symbols_file:
+        with open(args.symbols_file) as f:
+            symbols += [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    return symbols
+
+def _cli_warm(args):
+    source = FixtureSource(fixture_dir=args.fixture_dir) if args.fixture_dir else None
+    def report(done, total, result):
+        status = f"error: {result['error']}" if result["error"] else f"{result['rows']} rows"
+        print(f"[{done}/{total}] {result['symbol']}: {status}")
+    results = fetch_universe(_read_symbols(args), source=source, max_workers=args.workers, rate_per_second=args.rate, retries=args.retries, progress=report)
+    failed = [r["symbol"] for r in results.values() if r["error"]]
+    print(f"Warmed {len(results) - len(failed)}/{len(results)} symbols.")
+    return 1 if failed else 0
+
+def _cli_compare(args):
+    results = compare_models_parallel(_read_symbols(args), model_names=args.models, max_workers=args.workers)
+    print(results.to_string(float_format=lambda mse: f"{mse:.4f}"))
+    return 0
+
+def _cli_backtest(args):
+    for stock_symbol in _read_symbols(args):
+        report, summary = backtest(stock_symbol.lower(), args.model, n_folds=args.folds, window=args.window,
+                                   train_size=args.train_size, warm_start=args.warm_start, max_workers=args.workers)
+        print(f"{stock_symbol.upper()} {args.model} ({args.window}, warm start {'on' if args.warm_start else 'off'})")
+        print(report.to_string(float_format=lambda value: f"{value:.4f}"))
+        print(f"Mean MSE {summary['mean_mse']:.4f}, wall {summary['wall_seconds']:.2f}s, "
+              f"fit {summary['fit_seconds']:.2f}s, predict {summary['predict_seconds']:.3f}s\n")
+    return 0
+
+def _cli_tune(args):
+    for stock_symbol in _read_symbols(args):
+        report, summary = tune(stock_symbol.lower(), args.model, n_candidates=args.candidates, eta=args.eta,
+                               n_folds=args.folds, n_jobs=args.jobs, save=not args.no_save)
+        print(f"{stock_symbol.upper()} {args.model}: {summary['trials']} trials in {summary['wall_seconds']:.1f}s")
+        print(report.sort_values(["rung", "mse"]).to_string(index=False, float_format=lambda value: f"{value:.4f}"))
+        print(f"Best MSE {summary['best_mse']:.4f} with {json.dumps(summary['best_params'])}\n")
+    return 0
+
+def _cli_intraday(args):
+    source = FixtureSource() if args.fixture else None
+    for stock_symbol in _read_symbols(args):
+        stock_symbol = stock_symbol.strip().lower()
+        meta = refresh_intraday(stock_symbol, source)
+        sizes = []
+        for interval in args.resample:
+            start = time.perf_counter()
+            bars = load_intraday(stock_symbol, interval=interval)
+            sizes.append(f"{interval}: {len(bars)} bars in {(time.perf_counter() - start) * 1000:.1f}ms")
+        print(f"{stock_symbol.upper()}: {sum(meta['chunks'].values())} minute bars in {len(meta['chunks'])} chunks, "
+              f"last {meta['last_date']}" + ("; " + ", ".join(sizes) if sizes else ""))
+    return 0
+
+def _read_sectors(path):
+    # CSV of symbol,sector
+    table = pd.read_csv(path)
+    return dict(zip(table.iloc[:, 0].str.lower(), table.iloc[:, 1]))
+
+def _cli_cross(args):
+    symbols = [symbol.strip().lower() for symbol in _read_symbols(args)]
+    sectors = _read_sectors(args.sectors) if args.sectors else None
+    dates, panel = cross_asset_features(symbols, args.index.lower() if args.index else None, sectors)
+    days = slice(-args.days, None) if args.days else slice(None)
+    frame = pd.DataFrame(panel[:, :, days].reshape(len(CROSS_ASSET_COLUMNS), -1).T, columns=CROSS_ASSET_COLUMNS,
+                         index=pd.MultiIndex.from_product([symbols, dates[days]], names=["symbol", "Date"]))
+    if args.output:
+        write_predictions(frame.reset_index(), args.output)
+        print(f"Wrote cross-asset features for {len(symbols)} symbols to {args.output}")
+    else:
+        print(frame.groupby(level="symbol").tail(1).to_string(float_format=lambda value: f"{value:.4f}"))
+    return 0
+
+def _cli_predict(args):
+    results = predict_many(_read_symbols(args), args.model, interval=args.interval)
+    if args.output:
+        write_predictions(results, args.output)
+        print(f"Wrote {len(results)} predictions to {args.output}")
+    else:
+        print(results.to_string(index=False))
+    return 1 if results["error"].notna().any() else 0
+
+def _cli_forecast(args):
+    results = forecast_many(_read_symbols(args), args.model, horizon=args.horizon, method=args.method, interval=args.interval)
+    if args.output:
+        write_predictions(results, args.output)
+        print(f"Wrote {args.horizon}-bar forecasts for {len(results)} symbols to {args.output}")
+    else:
+        print(results.to_string(index=False, float_format=lambda value: f"{value:.4f}"))
+    return 1 if results["error"].notna().any() else 0
+
+def _cli_export(args):
+    stock_symbol = args.symbol.strip().lower()
+    df = scrape_data(stock_symbol)
+    df.name = stock_symbol
+    model, _, scaler = train_model(df, "LSTM")
+    output = args.output or os.path.join(MODEL_DIR, f"{stock_symbol}_lstm.{args.format}")
+    export_lstm(model, output, args.format)
+    # The exported graph expects scaled windows; ship the scalers alongside it
+    with open(output + ".scaler.pkl", 'wb') as f:
+        pickle.dump(scaler, f)
+    print(f"Exported {stock_symbol.upper()} LSTM to {output}")
+    return 0
+
+def _cli_benchmark(args):
+    if args.target == "download":
+        benchmark_universe_download(n_symbols=args.symbols, max_workers=args.workers, rate_per_second=args.rate, latency=args.latency)
+    elif args.target == "indicators":
+        benchmark_indicators(n_symbols=args.symbols, n_days=args.days)
+    elif args.target == "inference":
+        benchmark_lstm_inference(n_rows=args.rows)
+    elif args.target == "startup":
+        benchmark_startup()
+    elif args.target == "cross":
+        benchmark_cross_asset(n_symbols=args.symbols, n_days=args.days)
+    elif args.target == "chart":
+        benchmark_chart(n_days=args.days)
+    elif args.target == "memory":
+        benchmark_feature_memory(n_days=args.days)
+    elif args.target == "forest":
+        benchmark_forest(n_days=args.days)
+    elif args.target == "forecast":
+        benchmark_forecast(n_symbols=args.symbols, n_days=args.days)
+    return 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Machine Learning Market Predictor")
+    parser.add_argument("--timings", action="store_true", help="Print the slowest pipeline stages when the command finishes")
+    parser.add_argument("--trace", help="Write per-stage timings of the run to this file")
+    parser.add_argument("--trace-format", choices=["json", "chrome"], default="json")
+    parser.add_argument("--trace-memory", action="store_true", help="Also record peak memory per stage (slower)")
+    parser.add_argument("--compact", action="store_true", help="Keep prices and features as float32 and volume as an integer")
+    parser.add_argument("--cross-universe", help="File of symbols whose cross-asset columns are added to the model features")
+    parser.add_argument("--cross-index", help="Index symbol for the cross-asset correlation and beta")
+    parser.add_argument("--cross-sectors", help="CSV of symbol,sector for the sector-relative return")
+    subparsers = parser.add_subparsers(dest="command")
+
+    warm_parser = subparsers.add_parser("warm", help="Download/refresh cached bars for many symbols")
+    warm_parser.add_argument("symbols", nargs="*")
+    warm_parser.add_argument("--symbols-file", help="File with one symbol per line")
+    warm_parser.add_argument("--workers", type=int, default=8)
+    warm_parser.add_argument("--rate", type=float, default=5.0, help="Maximum requests per second across all workers")
+    warm_parser.add_argument("--retries", type=int, default=3)
+    warm_parser.add_argument("--fixture-dir", help="Read {symbol}.csv fixtures instead of calling yfinance")
+    warm_parser.set_defaults(func=_cli_warm)
+
+    predict_parser = subparsers.add_parser("predict", help="Predict the next close for many symbols without the GUI")
+    predict_parser.add_argument("symbols", nargs="*")
+    predict_parser.add_argument("--symbols-file", help="File with one symbol per line")
+    predict_parser.add_argument("--model", choices=list(AVAILABLE_MODELS.keys()), default="Random Forest")
+    predict_parser.add_argument("--output", help="Write results to a .csv or .parquet file")
+    predict_parser.add_argument("--interval", default="1d", help="Bar size: 1d (daily store) or an intraday size such as 1m, 5m, 1h")
+    predict_parser.set_defaults(func=_cli_predict)
+
+    forecast_parser = subparsers.add_parser("forecast", help="Predict the next N closes for many symbols")
+    forecast_parser.add_argument("symbols", nargs="*")
+    forecast_parser.add_argument("--symbols-file", help="File with one symbol per line")
+    forecast_parser.add_argument("--model", choices=list(AVAILABLE_MODELS.keys()), default="Random Forest")
+    forecast_parser.add_argument("--horizon", type=int, default=5, help="Number of bars to forecast")
+    forecast_parser.add_argument("--method", choices=FORECAST_METHODS, default="recursive",
+                                 help="recursive: roll the next-bar model forward; direct: one multi-output model")
+    forecast_parser.add_argument("--output", help="Write results to a .csv or .parquet file")
+    forecast_parser.add_argument("--interval", default="1d", help="Bar size: 1d (daily store) or an intraday size such as 1m, 5m, 1h")
+    forecast_parser.set_defaults(func=_cli_forecast)
+
+    cross_parser = subparsers.add_parser("cross", help="Rolling correlation/beta, sector-relative returns and ranks across cached symbols")
+    cross_parser.add_argument("symbols", nargs="*")
+    cross_parser.add_argument("--symbols-file", help="File with one symbol per line")
+    cross_parser.add_argument("--index", help="Index symbol for correlation and beta (default: equal-weighted universe)")
+    cross_parser.add_argument("--sectors", help="CSV of symbol,sector")
+    cross_parser.add_argument("--days", type=int, default=None, help="Only output the last N days")
+    cross_parser.add_argument("--output", help="Write results to a .csv or .parquet file")
+    cross_parser.set_defaults(func=_cli_cross)
+
+    intraday_parser = subparsers.add_parser("intraday", help="Ingest minute bars into the chunked intraday store")
+    intraday_parser.add_argument("symbols", nargs="*")
+    intraday_parser.add_argument("--symbols-file", help="File with one symbol per line")
+    intraday_parser.add_argument("--resample", nargs="*", default=[], help="Bar sizes to aggregate and report, e.g. 5m 1h 1d")
+    intraday_parser.add_argument("--fixture", action="store_true", help="Use synthetic minute bars instead of yfinance")
+    intraday_parser.set_defaults(func=_cli_intraday)
+
+    compare_parser = subparsers.add_parser("compare", help="Train and score models for many symbols in parallel")
+    compare_parser.add_argument("symbols", nargs="*")
+    compare_parser.add_argument("--symbols-file", help="File with one symbol per line")
+    compare_parser.add_argument("--models", nargs="+", choices=list(AVAILABLE_MODELS.keys()))
+    compare_parser.add_argument("--workers", type=int, default=None)
+    compare_parser.set_defaults(func=_cli_compare)
+
+    backtest_parser = subparsers.add_parser("backtest", help="Walk-forward backtest of one model")
+    backtest_parser.add_argument("symbols", nargs="*")
+    backtest_parser.add_argument("--symbols-file", help="File with one symbol per line")
+    backtest_parser.add_argument("--model", choices=list(AVAILABLE_MODELS.keys()), default="Random Forest")
+    backtest_parser.add_argument("--folds", type=int, default=5)
+    backtest_parser.add_argument("--window", choices=["expanding", "rolling"], default="expanding")
+    backtest_parser.add_argument("--train-size", type=int, default=None, help="Rows per training window (rolling only)")
+    backtest_parser.add_argument("--warm-start", action="store_true", help="Continue each fold from the previous model")
+    backtest_parser.add_argument("--workers", type=int, default=None)
+    backtest_parser.set_defaults(func=_cli_backtest)
+
+    tune_parser = subparsers.add_parser("tune", help="Search hyperparameters over walk-forward folds (successive halving)")
+    tune_parser.add_argument("symbols", nargs="*")
+    tune_parser.add_argument("--symbols-file", help="File with one symbol per line")
+    tune_parser.add_argument("--model", choices=list(SEARCH_SPACES.keys()), default="Random Forest")
+    tune_parser.add_argument("--candidates", type=int, default=27)
+    tune_parser.add_argument("--eta", type=int, default=3, help="Keep 1/eta of the candidates after each rung")
+    tune_parser.add_argument("--folds", type=int, default=3)
+    tune_parser.add_argument("--jobs", type=int, default=None, help="Worker processes (default: all cores)")
+    tune_parser.add_argument("--no-save", action="store_true", help="Do not store the best parameters for the symbol")
+    tune_parser.set_defaults(func=_cli_tune)
+
+    export_parser = subparsers.add_parser("export", help="Export a symbol's LSTM for lightweight CPU serving")
+    export_parser.add_argument("symbol")
+    export_parser.add_argument("--format", choices=["tflite", "onnx"], default="tflite")
+    export_parser.add_argument("--output", help="Destination file (default: models/{symbol}_lstm.{format})")
+    export_parser.set_defaults(func=_cli_export)
+
+    bench_parser = subparsers.add_parser("benchmark", help="Run an offline benchmark")
+    bench_parser.add_argument("target", choices=["download", "indicators", "inference", "startup", "memory", "chart", "cross", "forest", "forecast"])
+    bench_parser.add_argument("--symbols", type=int, default=500)
+    bench_parser.add_argument("--workers", type=int, default=16)
+    bench_parser.add_argument("--rate", type=float, default=200.0)
+    bench_parser.add_argument("--latency", type=float, default=0.02, help="Simulated seconds per request")
+    bench_parser.add_argument("--days", type=int, default=1260)
+    bench_parser.add_argument("--rows", type=int, default=256, help="Batch size for the inference benchmark")
+    bench_parser.set_defaults(func=_cli_benchmark)
+
+    args = parser.parse_args(argv)
+    global COMPACT_FEATURES
+    COMPACT_FEATURES = COMPACT_FEATURES or args.compact
+    if args.cross_universe:
+        # Symbols the command works on join the universe, so they all get the columns
+        with open(args.cross_universe) as f:
+            universe = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+        if hasattr(args, "symbols_file"):
+            universe += _read_symbols(args)
+        elif hasattr(args, "symbol"):
+            universe.append(args.symbol)
+        use_cross_asset_features(universe, args.cross_index, _read_sectors(args.cross_sectors) if args.cross_sectors else None)
+    if args.command is None:
+        setup_gui()
+        return 0
+    if not (args.timings or args.trace):
+        return args.func(args)
+    with recording(args.command, trace_memory=args.trace_memory) as trace:
+        status = args.func(args)
+    if args.timings:
+        print(trace.summary(top=10).to_string(index=False, float_format=lambda value: f"{value:.3f}"), file=sys.stderr)
+    if args.trace:
+        trace.export(args.trace, args.trace_format)
+    return status
 
 # Run the GUI
 if __name__ == "__main__":
-    setup_gui()
+    sys.exit(main())